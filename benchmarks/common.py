@@ -0,0 +1,101 @@
+"""
+Shared helpers of the superinvoke benchmarks.
+
+Every benchmark is a script with its own `run` function returning its JSON results, which are
+summarized, written and compared against a previous run with these helpers.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from typing import Callable, Dict, List, Optional
+
+
+# Summarizes the samples of a scenario as their minimum, median and maximum in the specified unit.
+# Values are rounded to the specified digits, or truncated to integers if None.
+def summarize(samples: List[float], unit: str, digits: Optional[int] = 3) -> Dict:
+    def value(number: float) -> float:
+        return round(number, digits) if digits is not None else int(number)
+
+    return {
+        f"min_{unit}": value(min(samples)),
+        f"median_{unit}": value(statistics.median(samples)),
+        f"max_{unit}": value(max(samples)),
+    }
+
+
+# Compares the current results against a baseline returning the found regressions, the scenarios
+# whose median got slower than the threshold allows. The summary of each scenario is got with
+# metric, and only the specified scenarios are compared if any.
+def compare(
+    current: Dict,
+    baseline: Dict,
+    threshold: float,
+    unit: str,
+    operation: str,
+    metric: Callable[[Dict], Dict] = lambda result: result,
+    scenarios: Optional[List[str]] = None,
+) -> List[str]:
+    regressions = []
+
+    for scenario, result in current["results"].items():
+        previous = baseline.get("results", {}).get(scenario)
+        if not previous or (scenarios is not None and scenario not in scenarios):
+            continue
+
+        now, before = metric(result)[f"median_{unit}"], metric(previous)[f"median_{unit}"]
+        if before and now > before * threshold:
+            regressions.append(f"{scenario}: {operation} took {now}{unit}, was {before}{unit}")
+
+    return regressions
+
+
+# Adds the options shared by every benchmark to write and compare their results.
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--output", help="Path where the JSON results will be written.")
+    parser.add_argument("--baseline", help="Path of previous JSON results to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed slowdown ratio against the baseline.")
+
+
+# Prints the JSON results, also writing them to output if specified.
+def write(results: Dict, output: Optional[str]) -> None:
+    results = json.dumps(results, indent=2)
+
+    if output:
+        with open(output, "w") as f:
+            f.write(results + "\n")
+
+    print(results)
+
+
+# Prints the found regressions, returning the exit code of the benchmark.
+def report(regressions: List[str]) -> int:
+    for regression in regressions:
+        print(f"REGRESSION: {regression}", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+# Runs a benchmark from the command line. Its specific arguments, by name and argparse options,
+# are passed to run, and its results are compared with compare against the baseline if specified.
+def main(
+    description: str,
+    run: Callable[..., Dict],
+    compare: Callable[[Dict, Dict, float], List[str]],
+    arguments: Dict[str, Dict],
+) -> int:
+    parser = argparse.ArgumentParser(description=description)
+    for name, options in arguments.items():
+        parser.add_argument(f"--{name}", **options)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    current = run(**{name: getattr(args, name) for name in arguments})
+    write(current, args.output)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, "r") as f:
+        return report(compare(current, json.load(f), args.threshold))
@@ -0,0 +1,109 @@
+"""
+Superinvoke filesystem helpers benchmark.
+
+Measures the Context filesystem helpers (create, read, exists, move and remove) run from a
+directory entered with Context.cd, both sequentially and from many threads at once, each one
+in its own directory, checking that every file ends up where its thread expects it. Results
+are printed as JSON and can be compared against a previous run.
+
+Usage:
+    python benchmarks/filesystem.py [--runs 5] [--files 200] [--threads 32]
+                                    [--output result.json] [--baseline result.json] [--threshold 1.25]
+"""
+
+import functools
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import common  # noqa: E402
+from invoke import Config, Context  # noqa: E402
+
+import superinvoke  # noqa: E402
+
+# Number of helper calls of each file cycle: create, exists, read, move, exists and remove.
+CALLS = 6
+
+
+# Creates, reads, moves and removes files in a directory, returning the number of failed checks.
+def cycle(context: Context, directory: str, files: int) -> int:
+    failures = 0
+
+    with context.cd(directory):
+        for index in range(files):
+            context.create(f"file-{index}.txt", [directory, index])
+            failures += context.exists(f"file-{index}.txt") != "file"
+            failures += context.read(f"file-{index}.txt") != [directory, str(index)]
+            context.move(f"file-{index}.txt", f"moved-{index}.txt")
+            failures += context.exists(f"moved-{index}.txt") != "file"
+            context.remove(f"moved-{index}.txt")
+
+    return failures
+
+
+def run(runs: int, files: int = 200, threads: int = 32) -> Dict:
+    superinvoke.init()
+    root = tempfile.mkdtemp(prefix="superinvoke-bench-")
+
+    try:
+        directories = [f"{root}/thread-{index}" for index in range(threads)]
+        for directory in directories:
+            os.makedirs(directory)
+
+        sequential, concurrent = [], []
+        for _ in range(runs):
+            context = Context(Config())
+            start = time.perf_counter()
+            failures = cycle(context, directories[0], files)
+            sequential.append((time.perf_counter() - start) * 1e6 / (files * CALLS))
+
+            if failures:
+                raise AssertionError(f"sequential: {failures} failed checks")
+
+            # Each thread has its own context, as each task run does
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                start = time.perf_counter()
+                failures = sum(pool.map(lambda directory: cycle(Context(Config()), directory, files), directories))
+                concurrent.append((time.perf_counter() - start) * 1e6 / (files * CALLS * threads))
+
+            if failures:
+                raise AssertionError(f"concurrent: {failures} failed checks")
+
+            # Files of any thread must not have been written to another directory
+            leftovers = [name for directory in directories + [root] for name in os.listdir(directory)]
+            if len(leftovers) != threads:
+                raise AssertionError(f"concurrent: unexpected files {sorted(leftovers)}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "benchmark": "filesystem",
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "files": files,
+        "threads": threads,
+        "results": {"sequential": common.summarize(sequential, "us"), "concurrent": common.summarize(concurrent, "us")},
+    }
+
+
+def main() -> int:
+    return common.main(
+        "Superinvoke filesystem helpers benchmark.",
+        run,
+        functools.partial(common.compare, unit="us", operation="each helper call"),
+        {
+            "runs": {"type": int, "default": 5, "help": "Number of measurements per scenario."},
+            "files": {"type": int, "default": 200, "help": "Number of files cycled by each thread."},
+            "threads": {"type": int, "default": 32, "help": "Number of threads of the concurrent scenario."},
+        },
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
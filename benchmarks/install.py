@@ -0,0 +1,185 @@
+"""
+Superinvoke install benchmark.
+
+Installs synthetic tools end to end, downloading their tar.gz, zip and raw artifacts from a
+local HTTP server, so no network is used. Tools are installed with an empty artifact cache
+(cold), with their artifacts already cached (cached), and checked when they are already
+installed (installed). Results are printed as JSON and can be compared against a previous run.
+
+Usage:
+    python benchmarks/install.py [--runs 5] [--tools 6] [--size 4] [--jobs 4]
+                                 [--output result.json] [--baseline result.json] [--threshold 1.25]
+"""
+
+import base64
+import contextlib
+import functools
+import hashlib
+import http.server
+import io
+import os
+import random
+import shutil
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import common  # noqa: E402
+from invoke import Config, Context  # noqa: E402
+
+import superinvoke  # noqa: E402
+from superinvoke import collections, constants  # noqa: E402
+from superinvoke.objects import Manifest, Tool, Tools  # noqa: E402
+
+# Seed of the artifacts payload, so every run downloads the same bytes.
+SEED = 42
+
+# Kinds of artifacts the synthetic tools are distributed as, in turns.
+KINDS = ["tar.gz", "zip", "raw"]
+
+
+# Serves the artifacts directory without logging every request.
+class Handler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+# Creates the executable of a tool, a shell script printing its version padded with size bytes.
+def executable(name: str, size: int, rng: random.Random) -> bytes:
+    payload = base64.encodebytes(rng.getrandbits(size * 6).to_bytes(size * 3 // 4, "little"))
+    return f'#!/bin/sh\necho "{name} version 1.2.3"\nexit 0\n'.encode("utf-8") + payload
+
+
+# Writes the artifact of each synthetic tool, returning their links in the current platform.
+def artifacts(directory: str, url: str, tools: int, size: int) -> Dict[str, tuple]:
+    rng = random.Random(SEED)
+    links = {}
+
+    for index in range(tools):
+        name = f"bench-tool-{index}"
+        kind = KINDS[index % len(KINDS)]
+        data = executable(name, size, rng)
+
+        if kind == "tar.gz":
+            path, member = f"{directory}/{name}.tar.gz", f"{name}/bin/{name}"
+            with tarfile.open(path, "w:gz") as archive:
+                info = tarfile.TarInfo(member)
+                info.size = len(data)
+                info.mode = 0o755
+                archive.addfile(info, io.BytesIO(data))
+        elif kind == "zip":
+            path, member = f"{directory}/{name}.zip", f"{name}/{name}"
+            with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr(member, data)
+        else:
+            path, member = f"{directory}/{name}", "."
+            with open(path, "wb") as f:
+                f.write(data)
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+
+        links[name] = (f"{url}/{os.path.basename(path)}", member, f"sha256:{digest}")
+
+    return links
+
+
+def run(runs: int, tools: int = 6, size: int = 4, jobs: int = 4) -> Dict:
+    root = tempfile.mkdtemp(prefix="superinvoke-bench-")
+    served, project, cache = f"{root}/served", f"{root}/project", f"{root}/cache"
+    for directory in [served, project, cache]:
+        os.makedirs(directory)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=served))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    environ, cwd = dict(os.environ), os.getcwd()
+    try:
+        os.environ["SUPERINVOKE_CACHE_HOME"] = cache
+        os.environ["NO_PROXY"] = os.environ["no_proxy"] = "127.0.0.1"
+        os.chdir(project)
+
+        links = artifacts(served, f"http://127.0.0.1:{server.server_address[1]}", tools, size * 1024 * 1024)
+        BenchTools = type(Tools)(
+            "BenchTools",
+            (Tools,),
+            {
+                name.replace("-", "_").upper(): Tool(
+                    name=name, version="^1.2.0", tags=[], links={constants.Platforms.CURRENT: link}
+                )
+                for name, link in links.items()
+            },
+        )
+
+        namespace = superinvoke.init(tools=BenchTools)
+        config = Config()
+        config.load_collection(namespace.configuration())
+        context = Context(config)
+
+        # Removes the installed tools, and the cached artifacts too when cold
+        def reset(scenario: str) -> None:
+            if scenario in ["cold", "cached"]:
+                shutil.rmtree(constants.Paths.TOOLS, ignore_errors=True)
+            if scenario == "cold":
+                shutil.rmtree(cache, ignore_errors=True)
+
+        results = {}
+        for scenario in ["cold", "cached", "installed"]:
+            samples = []
+
+            for _ in range(runs):
+                reset(scenario)
+
+                with open(os.devnull, "w") as devnull:
+                    with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+                        start = time.perf_counter()
+                        collections.tool.install(context, include="*", yes=True, jobs=jobs)
+                        samples.append((time.perf_counter() - start) * 1e3)
+
+                missing = [tool.name for tool in BenchTools.All if not Manifest.Check(tool)]
+                if missing:
+                    raise AssertionError(f"{scenario}: {', '.join(missing)} not installed")
+
+            results[scenario] = common.summarize(samples, "ms")
+    finally:
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(environ)
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "benchmark": "install",
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "tools": tools,
+        "size_mib": size,
+        "jobs": jobs,
+        "results": results,
+    }
+
+
+def main() -> int:
+    return common.main(
+        "Superinvoke install benchmark.",
+        run,
+        functools.partial(common.compare, unit="ms", operation="install"),
+        {
+            "runs": {"type": int, "default": 5, "help": "Number of installs per scenario."},
+            "tools": {"type": int, "default": 6, "help": "Number of synthetic tools to install."},
+            "size": {"type": int, "default": 4, "help": "Size in MiB of each tool executable."},
+            "jobs": {"type": int, "default": 4, "help": "Number of tools installed concurrently."},
+        },
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Superinvoke registry benchmark.
+
+Measures the Tools registry lookups (All, ByTag and ByName, with exact names and globs) over
+thousands of synthetic tools and tags, and the time to build the registry index after the
+registry is modified. Results are printed as JSON and can be compared against a previous run.
+
+Usage:
+    python benchmarks/registry.py [--runs 50] [--tools 5000] [--tags 200]
+                                  [--output result.json] [--baseline result.json] [--threshold 1.25]
+"""
+
+import functools
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import common  # noqa: E402
+
+from superinvoke.objects import Tags, Tool, Tools  # noqa: E402
+
+# Seed of the synthetic registry, so every run measures the same tools and queries.
+SEED = 42
+
+
+# Creates a registry of synthetic tools, each one with a few tags and a link for every platform.
+def registry(tools: int, tags: int) -> type:
+    rng = random.Random(SEED)
+
+    members = list(Tags("BenchTags", {f"TAG{index}": f"tag-{index}" for index in range(tags)}))
+
+    attributes = {}
+    for index in range(tools):
+        name = f"{rng.choice(['go', 'kube', 'terra', 'lint', 'proto'])}-tool-{index}"
+        attributes[name.replace("-", "_").upper()] = Tool(
+            name=name,
+            version=f"^{rng.randint(0, 9)}.{rng.randint(0, 30)}.0",
+            tags=rng.sample(members, k=min(3, len(members))),
+            links={
+                platform: (f"https://example.com/{name}/{platform}.tar.gz", name)
+                for platform in ["linux", "darwin", "win32"]
+            },
+            path=f"/opt/bench/{name}",
+        )
+
+    return type(Tools)("BenchTools", (Tools,), attributes)
+
+
+# Times an operation, returning the microseconds per call of each run.
+def measure(operation: Callable[[], object], runs: int, repeat: int) -> List[float]:
+    samples = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            operation()
+        samples.append((time.perf_counter() - start) * 1e6 / repeat)
+
+    return samples
+
+
+def run(runs: int, tools: int = 5000, tags: int = 200) -> Dict:
+    BenchTools = registry(tools, tags)
+
+    # Invalidates the registry index, as defining or replacing any tool does
+    def rebuild():
+        setattr(BenchTools, "_BENCH_MUTATION", None)
+        return BenchTools.All
+
+    names = [tool.name for tool in BenchTools.All]
+    scenarios = {
+        "index": (rebuild, 1),
+        "all": (lambda: BenchTools.All, 1000),
+        "by_name": (lambda: BenchTools.ByName(names[len(names) // 2]), 1000),
+        "by_name_glob": (lambda: BenchTools.ByName("kube-*"), 5),
+        "by_tag": (lambda: BenchTools.ByTag("tag-7"), 1000),
+        "by_tag_glob": (lambda: BenchTools.ByTag("tag-1*"), 5),
+    }
+
+    results = {}
+    for scenario, (operation, repeat) in scenarios.items():
+        # Lookups are measured with the index already built
+        BenchTools.All
+        results[scenario] = common.summarize(measure(operation, runs, repeat), "us")
+
+    return {
+        "benchmark": "registry",
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "tools": tools,
+        "tags": tags,
+        "results": results,
+    }
+
+
+def main() -> int:
+    return common.main(
+        "Superinvoke registry benchmark.",
+        run,
+        functools.partial(common.compare, unit="us", operation="each call"),
+        {
+            "runs": {"type": int, "default": 50, "help": "Number of measurements per scenario."},
+            "tools": {"type": int, "default": 5000, "help": "Number of synthetic tools in the registry."},
+            "tags": {"type": int, "default": 200, "help": "Number of synthetic tags in the registry."},
+        },
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
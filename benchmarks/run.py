@@ -0,0 +1,82 @@
+"""
+Superinvoke benchmark suite.
+
+Runs every benchmark (startup, registry, versions, install and filesystem), each one in its
+own interpreter, and combines their JSON results. None of them uses the network. Results can
+be compared against a previous run of the suite, failing when any benchmark regressed.
+
+Usage:
+    python benchmarks/run.py [--only registry,versions] [--output result.json] [--baseline result.json]
+                             [--threshold 1.25]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import common
+
+BENCHMARKS = ["startup", "registry", "versions", "install", "filesystem"]
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# Runs a benchmark, returning its results and regressions against its baseline results if any.
+def run(name: str, baseline: Optional[Dict], threshold: float) -> Tuple[Dict, List[str]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        command = [sys.executable, f"{ROOT}/{name}.py", "--output", f"{tmp}/current.json"]
+
+        if baseline is not None:
+            with open(f"{tmp}/baseline.json", "w") as f:
+                json.dump(baseline, f)
+            command += ["--baseline", f"{tmp}/baseline.json", "--threshold", str(threshold)]
+
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+        try:
+            with open(f"{tmp}/current.json", "r") as f:
+                current = json.load(f)
+        except (OSError, ValueError):
+            raise RuntimeError(f"{name} benchmark failed:\n{result.stderr}") from None
+
+    prefix = "REGRESSION: "
+    regressions = [f"{name}: {line[len(prefix):]}" for line in result.stderr.splitlines() if line.startswith(prefix)]
+
+    return current, regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Superinvoke benchmark suite.")
+    parser.add_argument("--only", help=f"Comma separated benchmarks to run, from: {', '.join(BENCHMARKS)}.")
+    common.add_arguments(parser)
+    args = parser.parse_args()
+
+    names = [name for name in (args.only or ",".join(BENCHMARKS)).split(",") if name]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f).get("benchmarks", {})
+
+    current = {"benchmark": "suite", "python": sys.version.split()[0], "benchmarks": {}}
+    regressions = []
+    for name in names:
+        print(f"Running {name} benchmark...", file=sys.stderr)
+        result, found = run(name, baseline.get(name) if args.baseline else None, args.threshold)
+        current["benchmarks"][name] = result
+        regressions += found
+
+    common.write(current, args.output)
+
+    return common.report(regressions)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Superinvoke startup benchmark.
+
+Measures the import time of superinvoke with `python -X importtime` and checks that heavy
+dependencies are not imported at startup. Results are printed as JSON and can be compared
+against a previous run to detect regressions.
+
+Usage:
+    python benchmarks/startup.py [--runs 10] [--output result.json] [--baseline result.json] [--threshold 1.25]
+"""
+
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+import common
+
+# Modules that must only be imported inside the code paths that use them.
+LAZY_MODULES = ["rich", "semantic_version", "download", "requests", "tqdm", "tarfile", "urllib.request"]
+
+IMPORTTIME_REGEX = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Imports superinvoke in a fresh interpreter, returning the cumulative import time in
+# microseconds of each module and the heavy modules that were imported.
+def measure(preload: str) -> Dict:
+    code = f"{preload}\nimport sys, superinvoke\nprint(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_REGEX.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+
+    return {
+        "modules": modules,
+        "lazy_imported": [module for module in result.stdout.strip().split(",") if module],
+    }
+
+
+def run(runs: int) -> Dict:
+    results = {}
+
+    # Cold: superinvoke with all its dependencies. Warm: as loaded by the invoke CLI.
+    for scenario, preload in [("cold", ""), ("warm", "import invoke")]:
+        measurements = [measure(preload) for _ in range(runs)]
+
+        results[scenario] = {
+            "superinvoke": common.summarize(
+                [measurement["modules"].get("superinvoke", 0) for measurement in measurements], "us", digits=None
+            ),
+            "lazy_imported": sorted({module for m in measurements for module in m["lazy_imported"]}),
+            "slowest_modules": sorted(
+                ((name, time) for name, time in measurements[-1]["modules"].items() if name.startswith("superinvoke")),
+                key=lambda module: -module[1],
+            )[:10],
+        }
+
+    return {"benchmark": "startup", "python": sys.version.split()[0], "runs": runs, "results": results}
+
+
+# Compares the current results against a baseline returning the found regressions, also
+# the heavy modules that are now imported at startup.
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    regressions = common.compare(
+        current, baseline, threshold, "us", "superinvoke import", metric=lambda result: result["superinvoke"]
+    )
+
+    for scenario, result in current["results"].items():
+        previous = baseline.get("results", {}).get(scenario)
+        if not previous:
+            continue
+
+        for module in set(result["lazy_imported"]) - set(previous["lazy_imported"]):
+            regressions.append(f"{scenario}: {module} is now imported at startup")
+
+    return regressions
+
+
+def main() -> int:
+    return common.main(
+        "Superinvoke startup benchmark.",
+        run,
+        compare,
+        {
+            "runs": {"type": int, "default": 10, "help": "Number of interpreters to measure per scenario."},
+        },
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Superinvoke version matching benchmark.
+
+Measures utils.compatible_version against typical `--version` outputs of tools like go,
+terraform or kubectl, both with cold caches (first probe of a process) and warm caches
+(repeated probes across list, install and remove), and compares it with the uncached
+implementation. Results are printed as JSON and can be compared against a previous run.
+
+Usage:
+    python benchmarks/versions.py [--runs 2000] [--output result.json] [--baseline result.json] [--threshold 1.25]
+"""
+
+import functools
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import common  # noqa: E402
+
+from superinvoke import utils  # noqa: E402
+
+# Outputs of `<tool> --version` (or `<tool> version`) and the specs they are checked against.
+CORPUS = {
+    "go": ("go version go1.21.5 linux/amd64", "^1.21.0"),
+    "terraform": (
+        "Terraform v1.6.6\non linux_amd64\n+ provider registry.terraform.io/hashicorp/aws v5.31.0\n"
+        + "+ provider registry.terraform.io/hashicorp/random v3.6.0\n\n"
+        + "Your version of Terraform is out of date! The latest version\nis 1.7.0. "
+        + "You can update by downloading from https://www.terraform.io/downloads.html",
+        "~1.6.0",
+    ),
+    "kubectl": (
+        'Client Version: version.Info{Major:"1", Minor:"28", GitVersion:"v1.28.4", '
+        + 'GitCommit:"bae2c62678db2b5053817bc97181fcc2e8388103", GitTreeState:"clean", '
+        + 'BuildDate:"2023-11-15T16:58:22Z", GoVersion:"go1.20.11", Compiler:"gc", Platform:"linux/amd64"}\n'
+        + "Kustomize Version: v5.0.4-0.20230601165947-6ce0bf390ce3\n"
+        + 'Server Version: version.Info{Major:"1", Minor:"27", GitVersion:"v1.27.8", '
+        + 'GitCommit:"9e2ca4a9d7a7b3d4b6a4a7d1c1f0d8e7c6b5a4f3", GitTreeState:"clean", '
+        + 'BuildDate:"2023-11-16T01:48:03Z", GoVersion:"go1.20.11", Compiler:"gc", Platform:"linux/amd64"}',
+        ">=1.27.0,<1.28.0",
+    ),
+    "golangci-lint": (
+        "golangci-lint has version 1.55.2 built with go1.21.3 from e3c2265f on 2023-11-03T12:59:25Z",
+        "^1.55.0",
+    ),
+    "docker": ("Docker version 24.0.7, build afdd53b", "^24.0.0"),
+    "helm": (
+        'version.BuildInfo{Version:"v3.13.3", GitCommit:"c8b948945e52abba22ff885446a1486cb5fd3474", '
+        + 'GitTreeState:"clean", GoVersion:"go1.20.11"}',
+        "^3.13.0",
+    ),
+    "missing": ("bash: nope: command not found", "^1.0.0"),
+}
+
+
+# Uncached implementation, parsing the spec and every candidate again on each call.
+def reference(input: str, target: str) -> Optional[str]:
+    import semantic_version
+
+    try:
+        spec = semantic_version.SimpleSpec(target)
+    except Exception:
+        return None
+
+    for version in utils.VERSION_REGEX.findall(input):
+        if len(version.split(".")) < 3:
+            version += ".0"
+
+        try:
+            version = semantic_version.Version(version)
+        except Exception:
+            continue
+
+        if version in spec:
+            return str(version)
+
+    return None
+
+
+def clear() -> None:
+    utils.compatible_version.cache_clear()
+    for name in ["__compile_spec", "__parse_version"]:
+        getattr(utils, name).cache_clear()
+
+
+# Times a function over the corpus, returning the microseconds per call of each run.
+def measure(function: Callable[[str, str], Optional[str]], runs: int, cold: bool) -> List[float]:
+    samples = []
+
+    for _ in range(runs):
+        if cold:
+            clear()
+
+        start = time.perf_counter()
+        for input, target in CORPUS.values():
+            function(input, target)
+        samples.append((time.perf_counter() - start) * 1e6 / len(CORPUS))
+
+    return samples
+
+
+def run(runs: int) -> Dict:
+    # Both implementations must agree on every output
+    for name, (input, target) in CORPUS.items():
+        expected, actual = reference(input, target), utils.compatible_version(input, target)
+        if expected != actual:
+            raise AssertionError(f"{name}: expected {expected}, got {actual}")
+
+    results = {
+        "reference": common.summarize(measure(reference, runs, cold=False), "us"),
+        "cold": common.summarize(measure(utils.compatible_version, runs, cold=True), "us"),
+        "warm": common.summarize(measure(utils.compatible_version, runs, cold=False), "us"),
+    }
+
+    return {"benchmark": "versions", "python": sys.version.split()[0], "runs": runs, "results": results}
+
+
+def main() -> int:
+    return common.main(
+        "Superinvoke version matching benchmark.",
+        run,
+        functools.partial(common.compare, unit="us", operation="compatible_version", scenarios=["cold", "warm"]),
+        {
+            "runs": {"type": int, "default": 2000, "help": "Number of passes over the corpus per scenario."},
+        },
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,27 @@ __version_info__ = (1, 0, 6)
 __version__ = ".".join(map(str, __version_info__))
 
 
-import invoke
-import rich
-
 from . import utils
-from .constants import Paths, Platforms, console
+from .constants import Paths, Platforms
 from .extensions.collection import Collection
 from .extensions.task import task
 from .main import init
 from .objects import Env, Envs, Tags, Tool, Tools
+
+
+# Lazily exposes heavy modules and objects, so they are only imported when used.
+def __getattr__(name):
+    if name == "invoke":
+        import invoke
+
+        return invoke
+
+    if name == "rich":
+        import rich
+
+        return rich
+
+    if name == "console":
+        return constants.console
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
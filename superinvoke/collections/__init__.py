@@ -1 +1 @@
-from . import env, misc, tool
+from . import cache, env, misc, tool
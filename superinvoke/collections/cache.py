@@ -0,0 +1,78 @@
+from invoke import task
+
+from .. import constants
+from ..objects import Cache
+
+
+# Formats a size in bytes in a human readable way.
+def human_size(size: int) -> str:
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024 or unit == "GiB":
+            break
+        size /= 1024
+
+    return f"{size:.1f} {unit}" if unit != "B" else f"{size} {unit}"
+
+
+@task(default=True)
+def stats(context):
+    """Show artifact cache statistics."""
+    from rich.table import Table
+
+    stats = Cache.Stats()
+
+    table = Table(show_header=False)
+    table.add_column("Stat", style="bold white", justify="left")
+    table.add_column("Value", justify="right")
+
+    table.add_row("Path", stats["path"])
+    table.add_row("Artifacts", str(stats["count"]))
+    table.add_row("Size", human_size(stats["size"]))
+    table.add_row("Limit", human_size(stats["limit"]) if Cache.Enabled else "[bold red1]disabled[/bold red1]")
+
+    constants.console.print("Listing artifact cache statistics:\n")
+    constants.console.print(table)
+
+
+@task(
+    help={
+        "size": "Maximum size in bytes the cache will be pruned to. Defaults to the cache limit. Example: 1073741824",
+    }
+)
+def prune(context, size=None):
+    """Evict least recently used artifacts."""
+    if size is not None:
+        try:
+            size = int(size)
+        except ValueError:
+            context.fail(f"{size} is not a valid size")
+
+    count, freed = Cache.Prune(size=size)
+
+    context.print(f"Evicted [cyan]{count}[/cyan] artifact(s) ([bold red1]{human_size(freed)}[/bold red1])")
+
+
+@task(
+    help={
+        "yes": "Automatically say yes to all prompts.",
+    }
+)
+def clear(context, yes=False):
+    """Remove all cached artifacts."""
+    if not yes:
+        answer = context.input("      Continue? Y/n: ").lower()
+        if answer == "y":
+            yes = True
+        elif answer == "n":
+            yes = False
+        elif not answer:
+            yes = True
+        else:
+            yes = False
+
+    if not yes:
+        context.exit()
+
+    count, freed = Cache.Clear()
+
+    context.print(f"Removed [cyan]{count}[/cyan] artifact(s) ([bold red1]{human_size(freed)}[/bold red1])")
@@ -1,5 +1,4 @@
 from invoke import task
-from rich.table import Table
 
 from .. import constants, utils
 
@@ -7,6 +6,8 @@ from .. import constants, utils
 @task(default=True)
 def list(context):
     """List available environments."""
+    from rich.table import Table
+
     from ..main import __ENVS__
 
     cur_env = __ENVS__.Current
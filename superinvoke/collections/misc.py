@@ -1,5 +1,3 @@
-from importlib import metadata
-
 from invoke import task
 
 
@@ -12,5 +10,54 @@ def help(context, collection):
 @task
 def version(context):
     """Show superinvoke version."""
+    from importlib import metadata
+
     context.print(f"Superinvoke: v{metadata.version('superinvoke')}")
     context.print(f"Invoke (neoxelox fork): v{metadata.version('neoxelox-invoke')}")
+
+
+@task(
+    help={
+        "base": "Revision the changes are compared to, the previous commit by default. Example: origin/main",
+        "merge_base": "Compare to the merge base of base and HEAD, i.e. only the changes made since branching.",
+        "worktree": "Include the staged and unstaged changes of the working tree.",
+        "untracked": "Include untracked files not ignored by git.",
+        "run": "Run the affected tasks instead of listing them.",
+    }
+)
+def affected(context, base=None, merge_base=False, worktree=False, untracked=False, run=False):
+    """List or run the tasks whose inputs were changed."""
+    from invoke import Executor
+
+    from .. import utils
+    from ..main import __ROOT__
+
+    names = {}
+    trie = utils.GlobTrie()
+    for name in sorted(__ROOT__.task_names):
+        task = __ROOT__[name]
+        if getattr(task, "inputs", None) and task not in names.values():
+            names[name] = task
+            for input in task.inputs:
+                trie.add(input, name)
+
+    affected = set()
+    for path in context.iter_changes(
+        base=base, merge_base=merge_base, worktree=worktree, untracked=untracked, renames=False
+    ):
+        affected |= trie.match(path)
+
+        # Every task is already affected, the rest of the changes are not read
+        if len(affected) == len(names):
+            break
+
+    affected = [name for name in names if name in affected]
+    if not affected:
+        context.info("No tasks affected")
+        return
+
+    if not run:
+        context.info(f"Affected task(s): {', '.join(affected)}")
+        return
+
+    Executor(__ROOT__, config=context.config).execute(*affected)
@@ -1,21 +1,96 @@
 import os
 import stat
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from typing import Optional
 
 from invoke import task
-from rich.table import Table
 
-from .. import constants, utils
+from .. import constants, tracing, utils
+from ..objects import Cache, Lockfile, Manifest
+
+# Default number of tools installed or checked concurrently.
+JOBS = 4
+
+# Default seconds to wait for a tool to print its version.
+TIMEOUT = 10
+
+
+# Gets the tools matching the comma separated tags, globs or tool names of include but not of exclude.
+def select_tools(include: str, exclude: str = "") -> set:
+    from ..main import __TOOLS__
+
+    include = {tool for tool in include.split(",") if tool and tool != ","}
+    include_tools = set()
+    for name_or_tag in include:
+        include_tools.update(__TOOLS__.ByName(name_or_tag))
+        include_tools.update(__TOOLS__.ByTag(name_or_tag))
+
+    exclude = {tool for tool in exclude.split(",") if tool and tool != ","}
+    exclude_tools = set()
+    for name_or_tag in exclude:
+        exclude_tools.update(__TOOLS__.ByName(name_or_tag))
+        exclude_tools.update(__TOOLS__.ByTag(name_or_tag))
+
+    return include_tools - exclude_tools
+
+
+# Checks whether a tool is installed with a compatible version. Managed tools are checked
+# against the installed manifest first and only executed when their binary has changed.
+# The digest of the artifact the tool has just been installed from is recorded if specified.
+def check_tool_version(context, tool, timeout: Optional[float] = None, digest: Optional[str] = None) -> bool:
+    if tool._managed:
+        installed = Manifest.Check(tool)
+        if installed is not None:
+            return installed
+
+    # Tools that cannot be resolved are not executed at all
+    if utils.which(tool) is None:
+        if tool._managed:
+            Manifest.Forget(tool)
+        return False
+
+    # Tools without a version spec only have to exist, so they are not executed
+    if not tool.version:
+        version = ""
+    else:
+        with tracing.span(tool.name, "tool.probe"):
+            version = utils.compatible_version(context.attempt(f"{tool} --version", timeout=timeout), tool.version) or (
+                utils.compatible_version(context.attempt(f"{tool} version", timeout=timeout), tool.version)
+            )
+
+    # Locked tools must have the exact locked version
+    locked = Lockfile.Version(tool) if tool._managed else None
+    if locked is not None and version != locked:
+        version = None
+
+    if tool._managed:
+        if version is not None:
+            Manifest.Record(tool, version, digest)
+        else:
+            Manifest.Forget(tool)
+
+    return version is not None
 
 
 def has_tool_version(context, tool):
     with constants.console.status(f"Gathering [cyan]{tool.name}[/cyan] version"):
-        return context.has(tool, version=tool.version)
+        return check_tool_version(context, tool)
 
 
-@task(default=True)
-def list(context):
+@task(
+    default=True,
+    help={
+        "jobs": "Number of tool versions that will be gathered concurrently. Example: 8",
+        "timeout": "Seconds to wait for each tool version before marking it as unknown. Example: 10",
+    },
+)
+def list(context, jobs=JOBS, timeout=TIMEOUT):
     """List available tools."""
+    from rich.table import Table
+
     from ..main import __TOOLS__
 
     table = Table(show_header=True, header_style="bold white")
@@ -23,17 +98,32 @@ def list(context):
     table.add_column("Version", justify="right")
     table.add_column("Tags", style="dim", justify="right")
 
-    for tool in __TOOLS__.All:
-        table.add_row(
-            tool.name,
-            f"[bold green3]{tool.version}[/bold green3]"
-            if has_tool_version(context, tool)
-            else f"[bold red1]{tool.version}[/bold red1]",
-            ", ".join(tool.tags),
-        )
+    tools = __TOOLS__.All
+
+    # Hung tools are killed after the timeout and marked as unknown (None)
+    def gather(tool):
+        try:
+            return check_tool_version(context, tool, timeout=timeout)
+        except TimeoutError:
+            return None
+
+    with constants.console.status(f"Gathering versions of {len(tools)} tool(s)"):
+        with ThreadPoolExecutor(max_workers=max(1, int(jobs))) as executor:
+            installed = executor.map(gather, tools)
+
+            for tool, is_installed in zip(tools, installed):
+                if is_installed is None:
+                    version = f"[bold yellow]{tool.version}[/bold yellow]"
+                elif is_installed:
+                    version = f"[bold green3]{tool.version}[/bold green3]"
+                else:
+                    version = f"[bold red1]{tool.version}[/bold red1]"
+
+                table.add_row(tool.name, version, ", ".join(tool.tags))
 
     constants.console.print(
-        "Listing [bold green3]installed[/bold green3] and [bold red1]not installed[/bold red1] tools:\n"
+        "Listing [bold green3]installed[/bold green3], [bold red1]not installed[/bold red1] "
+        + "and [bold yellow]unknown[/bold yellow] tools:\n"
     )
     constants.console.print(table)
 
@@ -52,34 +142,120 @@ def run(context, args):
 
     install(context, include=tool.name, exclude="", yes=False)
 
+    if utils.which(tool) is None:
+        context.fail(f"{tool_name} cannot be found")
+
     context.run(f"{tool} {args}")
 
 
+# Verifies that the tools matching include are installed with a compatible version, without installing
+# them. Managed tools are verified from the installed manifest and their file stats, and only executed
+# when the manifest cannot tell. Fails reporting every missing or incompatible tool at once.
+def verify(context, include: str, exclude: str = "") -> None:
+    problems = []
+
+    for tool in sorted(select_tools(include, exclude), key=lambda tool: tool.name):
+        installed = Manifest.Check(tool) if tool._managed else None
+        if installed is None:
+            installed = check_tool_version(context, tool)
+
+        if installed:
+            continue
+
+        entry = Manifest.Get(tool) if tool._managed else None
+        locked = Lockfile.Version(tool) if tool._managed else None
+        if utils.which(tool) is None:
+            problems.append(f"{tool.name} ({tool.version}) is not installed")
+        elif entry is not None and locked is not None:
+            problems.append(
+                f"{tool.name} ({tool.version}) has version {entry['version']} installed but {locked} is locked"
+            )
+        elif entry is not None:
+            problems.append(f"{tool.name} ({tool.version}) has an incompatible version {entry['version']} installed")
+        else:
+            problems.append(f"{tool.name} ({tool.version}) has an incompatible version installed")
+
+    if problems:
+        problems = "\n".join(f"      - {problem}" for problem in problems)
+        context.fail(f"Required tool(s) are missing or incompatible:\n{problems}")
+
+
+# Installs a single tool from its link, stage by stage, in an isolated temporary directory.
+# Returns an error message if the tool could not be installed.
+def install_tool(context, tool, progress, task_id, abort) -> Optional[str]:
+    if tool.link is None:
+        return f"No link set for {tool.name} in platform {constants.Platforms.CURRENT}"
+
+    digest = tool.digest or Lockfile.Digest(tool)
+
+    # Other processes may be installing the same tool, which is locked until it is verified
+    with tracing.span(tool.name, "install"), utils.file_lock(utils.path(f"{constants.Paths.LOCKS}/{tool.name}.lock")):
+        # The tool may have been installed by the process holding the lock meanwhile
+        if Manifest.Check(tool):
+            return None
+
+        # The previous installation, if any, is going to be replaced
+        Manifest.Forget(tool)
+
+        # The tool is prepared next to the installed tools so it can be renamed into place atomically
+        with tempfile.TemporaryDirectory(dir=utils.path(constants.Paths.TOOLS), prefix=".") as TMP:
+            tmp_path = utils.path(f"{TMP}/{tool.name}")
+
+            # The utils are used instead of the context filesystem helpers as these cannot verify
+            # digests nor extract a single member, and all paths are absolute anyway.
+            progress.update(task_id, description=f"Downloading [cyan]{tool.name}[/cyan]")
+            if tool.link[1] != ".":
+                # Only the tool member is extracted, either from the cached archive or straight from the
+                # download stream when there is no cache. Archives are verified while they are downloaded.
+                if Cache.Enabled:
+                    # The cached archive cannot be evicted by other processes until it is extracted
+                    with ExitStack() as stack:
+                        with tracing.span(tool.name, "install.download"):
+                            archive = stack.enter_context(Cache.Open(tool.link[0], digest=digest))
+                        if abort.is_set():
+                            return None
+
+                        progress.update(task_id, description=f"Extracting [cyan]{tool.name}[/cyan]")
+                        with tracing.span(tool.name, "install.extract"):
+                            utils.extract_member(archive, tool.link[1], tmp_path)
+                    Cache.Prune()
+                else:
+                    with tracing.span(tool.name, "install.download"):
+                        utils.download_member(tool.link[0], tool.link[1], tmp_path, digest=digest)
+            else:
+                with tracing.span(tool.name, "install.download"):
+                    Cache.Fetch(tool.link[0], tmp_path, digest=digest)
+
+            if abort.is_set():
+                return None
+
+            progress.update(task_id, description=f"Moving [cyan]{tool.name}[/cyan]")
+            with tracing.span(tool.name, "install.move"):
+                os.chmod(tmp_path, os.stat(tmp_path).st_mode | stat.S_IEXEC)
+                os.replace(tmp_path, tool.path)
+
+        progress.update(task_id, description=f"Verifying [cyan]{tool.name}[/cyan]")
+        with tracing.span(tool.name, "install.verify"):
+            if not check_tool_version(context, tool, digest=digest):
+                return f"Cannot install tool {tool.name}"
+
+    return None
+
+
 @task(
     help={
         "include": "Tags, globs or tool names that will be installed. Example: ops,golang-migrate,*...",
         "exclude": "Tags, globs or tool names that will be excluded. Example: golangci-lint,ci,dev*...",
         "yes": "Automatically say yes to all prompts.",
+        "jobs": "Number of tools that will be installed concurrently. Example: 8",
     }
 )
-def install(context, include, exclude="", yes=False):
+def install(context, include, exclude="", yes=False, jobs=JOBS):
     """Install available tools."""
-    from ..main import __TOOLS__
-
-    include = {tool for tool in include.split(",") if tool and tool != ","}
-    include_tools = set()
-    for name_or_tag in include:
-        include_tools.update(__TOOLS__.ByName(name_or_tag))
-        include_tools.update(__TOOLS__.ByTag(name_or_tag))
-
-    exclude = {tool for tool in exclude.split(",") if tool and tool != ","}
-    exclude_tools = set()
-    for name_or_tag in exclude:
-        exclude_tools.update(__TOOLS__.ByName(name_or_tag))
-        exclude_tools.update(__TOOLS__.ByTag(name_or_tag))
+    from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 
     tools = set()
-    for tool in include_tools - exclude_tools:
+    for tool in select_tools(include, exclude):
         if tool._managed:
             if not has_tool_version(context, tool):
                 tools.add(tool)
@@ -108,33 +284,62 @@ def install(context, include, exclude="", yes=False):
     if not yes:
         context.exit()
 
-    with tempfile.TemporaryDirectory() as TMP:
-        TMP = utils.path(TMP)
-        context.create(utils.path(constants.Paths.TOOLS), dir=True)
+    context.create(utils.path(constants.Paths.TOOLS), dir=True)
 
-        for tool in tools:
-            if not has_tool_version(context, tool):
-                with constants.console.status(
-                    f"Installing [cyan]{tool.name}[/cyan] ([green3]{tool.version}[/green3])"
-                ) as _:
-                    if tool.link is None:
-                        context.fail(f"No link set for {tool.name} in platform {constants.Platforms.CURRENT}")
-                    elif tool.link[1] != ".":
-                        tool_file = tool.link[0].split("/")[-1]
-                        context.download(tool.link[0], utils.path(f"{TMP}/{tool_file}"))
-                        context.extract(utils.path(f"{TMP}/{tool_file}"), utils.path(f"{TMP}/{tool.name}"))
-                        context.move(utils.path(f"{TMP}/{tool.name}/{tool.link[1]}"), tool.path)
-                    else:
-                        context.download(tool.link[0], utils.path(f"{TMP}/{tool.name}"))
-                        context.move(utils.path(f"{TMP}/{tool.name}"), tool.path)
-                        os.chmod(tool.path, os.stat(tool.path).st_mode | stat.S_IEXEC)
-
-                if has_tool_version(context, tool):
-                    context.print(f"Installed [cyan]{tool.name}[/cyan] ([bold green3]{tool.version}[/bold green3])")
-                else:
-                    context.fail(f"Cannot install tool {tool.name}")
-            else:
-                context.info(f"{tool.name} already installed")
+    abort = threading.Event()
+    error = None
+
+    progress = Progress(
+        SpinnerColumn(finished_text="[bold green3]✓[/bold green3]"),
+        TextColumn("{task.description}"),
+        TextColumn("([green3]{task.fields[version]}[/green3])"),
+        TimeElapsedColumn(),
+        console=constants.console,
+        transient=True,
+    )
+
+    # Pending tools are not started and running ones stop at their next stage
+    def stop(futures) -> None:
+        abort.set()
+        for pending in futures:
+            pending.cancel()
+
+    with progress, ThreadPoolExecutor(max_workers=max(1, int(jobs))) as executor:
+        futures = {}
+        for tool in sorted(tools, key=lambda tool: tool.name):
+            task_id = progress.add_task(f"Waiting [cyan]{tool.name}[/cyan]", total=1, version=tool.version)
+            futures[executor.submit(install_tool, context, tool, progress, task_id, abort)] = (tool, task_id)
+
+        try:
+            for future in as_completed(futures):
+                tool, task_id = futures[future]
+
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = f"Cannot install tool {tool.name}: {e}"
+
+                if result is not None:
+                    # Fail fast
+                    if error is None:
+                        error = result
+                        stop(futures)
+                    continue
+
+                if abort.is_set():
+                    continue
+
+                progress.update(task_id, completed=1, description=f"Installed [cyan]{tool.name}[/cyan]")
+                progress.console.print(
+                    f"Installed [cyan]{tool.name}[/cyan] ([bold green3]{tool.version}[/bold green3])"
+                )
+        except BaseException:
+            # Interrupted (Ctrl-C...), the executor only waits for the running tools when exiting
+            stop(futures)
+            raise
+
+    if error is not None:
+        context.fail(error)
 
 
 @task(
@@ -146,22 +351,8 @@ def install(context, include, exclude="", yes=False):
 )
 def remove(context, include, exclude="", yes=False):
     """Remove available tools."""
-    from ..main import __TOOLS__
-
-    include = {tool for tool in include.split(",") if tool and tool != ","}
-    include_tools = set()
-    for name_or_tag in include:
-        include_tools.update(__TOOLS__.ByName(name_or_tag))
-        include_tools.update(__TOOLS__.ByTag(name_or_tag))
-
-    exclude = {tool for tool in exclude.split(",") if tool and tool != ","}
-    exclude_tools = set()
-    for name_or_tag in exclude:
-        exclude_tools.update(__TOOLS__.ByName(name_or_tag))
-        exclude_tools.update(__TOOLS__.ByTag(name_or_tag))
-
     tools = set()
-    for tool in include_tools - exclude_tools:
+    for tool in select_tools(include, exclude):
         if tool._managed:
             if has_tool_version(context, tool):
                 tools.add(tool)
@@ -193,7 +384,9 @@ def remove(context, include, exclude="", yes=False):
     for tool in tools:
         if has_tool_version(context, tool):
             with constants.console.status(f"Uninstalling [cyan]{tool.name}[/cyan] ([red1]{tool.version}[/red1])") as _:
-                context.remove(tool)
+                with utils.file_lock(utils.path(f"{constants.Paths.LOCKS}/{tool.name}.lock")):
+                    context.remove(tool)
+                    Manifest.Forget(tool)
 
             if not has_tool_version(context, tool):
                 context.print(f"Uninstalled [cyan]{tool.name}[/cyan] ([bold red1]{tool.version}[/bold red1])")
@@ -201,3 +394,83 @@ def remove(context, include, exclude="", yes=False):
                 context.fail(f"Cannot uninstall tool {tool.name}")
         else:
             context.info(f"{tool.name} not installed")
+
+
+@task(
+    help={
+        "include": "Tags, globs or tool names that will be locked. Example: ops,golang-migrate,*...",
+        "exclude": "Tags, globs or tool names that will be excluded. Example: golangci-lint,ci,dev*...",
+        "update": "Lock again tools that are already locked.",
+        "check": "Fail if the lock file is not up to date instead of writing it.",
+        "jobs": "Number of artifacts that will be hashed concurrently. Example: 8",
+    }
+)
+def lock(context, include="*", exclude="", update=False, check=False, jobs=JOBS):
+    """Pin available tools to the lock file."""
+    from ..main import __TOOLS__
+
+    tools = sorted(
+        (tool for tool in select_tools(include, exclude) if tool._managed and tool.links), key=lambda tool: tool.name
+    )
+
+    if check:
+        outdated = [tool.name for tool in tools if Lockfile.Get(tool) is None]
+        if outdated:
+            context.fail(f"Lock file is not up to date for tool(s) {', '.join(outdated)}")
+        context.info(f"Lock file is up to date for {len(tools)} tool(s)")
+        return
+
+    tools = [tool for tool in tools if update or Lockfile.Get(tool) is None]
+    if not tools:
+        context.warn("No tools to lock")
+        return
+
+    # Versions are resolved from the tools installed in the current platform
+    installable = [tool.name for tool in tools if tool.link is not None]
+    if installable:
+        install(context, include=",".join(installable), yes=True, jobs=jobs)
+
+    previous = Lockfile.All()
+    entries = {}
+    for tool in tools:
+        entry = previous.get(tool.name) if isinstance(previous.get(tool.name), dict) else {}
+
+        if tool.link is not None:
+            version = (Manifest.Get(tool) or {}).get("version")
+        else:
+            version = entry.get("version") if entry.get("spec") == tool.version else None
+
+        if not version:
+            context.fail(f"Cannot resolve the version of {tool.name} in platform {constants.Platforms.CURRENT}")
+
+        platforms = {}
+        for platform, link in tool.links.items():
+            locked = entry.get("platforms", {}).get(str(platform), {})
+            digest = None
+            if len(link) > 2 and link[2]:
+                digest = ":".join(utils.parse_digest(link[2]))
+            elif locked.get("url") == link[0] and locked.get("member") == link[1]:
+                digest = locked.get("digest")
+
+            platforms[str(platform)] = {"url": link[0], "member": link[1], "digest": digest}
+
+        entries[tool.name] = {"spec": tool.version, "version": version, "platforms": platforms}
+
+    # Artifacts without a known digest are hashed while downloading
+    unknown = [link for entry in entries.values() for link in entry["platforms"].values() if not link["digest"]]
+    if unknown:
+        with constants.console.status(f"Hashing {len(unknown)} artifact(s)"):
+            with ThreadPoolExecutor(max_workers=max(1, int(jobs))) as executor:
+                digests = executor.map(lambda link: utils.download_digest(link["url"]), unknown)
+                for link, digest in zip(unknown, digests):
+                    link["digest"] = f"sha256:{digest}"
+
+    # Tools that are no longer available are dropped from the lock file
+    names = {tool.name for tool in __TOOLS__.All}
+    locks = {name: entry for name, entry in previous.items() if name in names}
+    locks.update(entries)
+
+    Lockfile.Write(locks)
+
+    for tool in tools:
+        context.print(f"Locked [cyan]{tool.name}[/cyan] ([bold green3]{entries[tool.name]['version']}[/bold green3])")
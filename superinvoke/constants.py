@@ -1,9 +1,13 @@
+import os
 import sys
-
-from rich.console import Console
+import threading
+from typing import TYPE_CHECKING
 
 from . import utils
 
+if TYPE_CHECKING:
+    from rich.console import Console
+
 
 # Different OS Platforms.
 # TODO: Add architechtures.
@@ -23,15 +27,59 @@ class Platforms(utils.StrEnum):
 # Different superinvoke paths.
 class Paths(utils.StrEnum):
     CACHE = ".superinvoke_cache"
+    LOCK = "superinvoke.lock"
 
     @utils.classproperty
     def TOOLS(cls):
         return f"{Paths.CACHE}/tools"
 
+    # Advisory lock files coordinating concurrent superinvoke processes.
+    @utils.classproperty
+    def LOCKS(cls):
+        return f"{Paths.CACHE}/locks"
+
+    @utils.classproperty
+    def MANIFEST(cls):
+        return f"{Paths.TOOLS}/manifest.json"
+
+    # Fingerprints of the last successful run of the tasks with declared inputs and outputs.
+    @utils.classproperty
+    def FINGERPRINTS(cls):
+        return f"{Paths.CACHE}/fingerprints"
+
     @utils.classproperty
     def ENV(cls):
         return f"{Paths.CACHE}/env"
 
+    @utils.classproperty
+    def HAS(cls):
+        return f"{Paths.CACHE}/has.json"
+
+    # Global cache shared across projects, can be overridden with SUPERINVOKE_CACHE_HOME.
+    @utils.classproperty
+    def ARTIFACTS(cls):
+        if os.environ.get("SUPERINVOKE_CACHE_HOME"):
+            return os.environ["SUPERINVOKE_CACHE_HOME"]
+
+        if Platforms.CURRENT == Platforms.WINDOWS and os.environ.get("LOCALAPPDATA"):
+            return f"{os.environ['LOCALAPPDATA']}/superinvoke"
+
+        return f"{os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')}/superinvoke"
+
+
+# Global console instance, created on first use as importing rich is expensive.
+console: "Console"
+__console_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    if name == "console":
+        with __console_lock:
+            if "console" not in globals():
+                from rich.console import Console
+
+                globals()["console"] = Console()
+
+        return globals()["console"]
 
-# Global console instance.
-console: Console = Console()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1 +1 @@
-from . import collection, context, task
+from . import collection, context, executor, task
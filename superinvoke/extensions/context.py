@@ -1,10 +1,22 @@
+import codecs
+import hashlib
+import json
 import os
+import re
+import signal
+import subprocess
 import sys
-from typing import List, Literal, Optional
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, Iterator, List, Literal, Optional
 
 from invoke.context import Context
 
-from .. import constants, utils
+from .. import constants, tracing, utils
+
+if TYPE_CHECKING:
+    from invoke.runners import Result
 
 
 # Writes to stdout and flushes.
@@ -49,63 +61,700 @@ def warn(message: str) -> None:
     )
 
 
+__run = Context.run
+
+
+# Runs the specified command, measured when profiling.
+def run(context: Context, command: str, **kwargs) -> "Result":
+    with tracing.span(command, "run"):
+        return __run(context, command, **kwargs)
+
+
 # Runs the specified command hiding its output, continuing if fails and returns stdout or stderr.
-def attempt(context: Context, command: str) -> str:
+# If a timeout is specified and the command exceeds it, TimeoutError is raised instead.
+def attempt(context: Context, command: str, timeout: Optional[float] = None) -> str:
+    with tracing.span(command, "attempt"):
+        if timeout is not None:
+            return __attempt_timeout(context, command, timeout)
+
+        try:
+            # Input is never forwarded so commands requiring it fail directly
+            # and concurrent attempts do not compete for stdin.
+            result = context.run(command, warn=True, hide="both", pty=False, in_stream=False)
+        except Exception:
+            return ""
+
+        stdout = result.stdout.strip()
+        stderr = result.stderr.strip()
+
+        return stdout or stderr
+
+
+# Pyinvoke's timeout only kills the shell, so commands whose children keep the output pipes
+# open (wrapper scripts, launchers...) would block until they finish. The command is run in
+# its own process group instead, and the whole group is killed once the timeout expires.
+def __attempt_timeout(context: Context, command: str, timeout: float) -> str:
+    kwargs = {}
+    if constants.Platforms.CURRENT == constants.Platforms.WINDOWS:
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+
     try:
-        # TODO: If input is required fail directly
-        result = context.run(command, warn=True, hide="both", pty=False)
+        process = subprocess.Popen(
+            context._prefix_commands(command),
+            shell=True,
+            executable=context.config.run.shell,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **kwargs,
+        )
     except Exception:
         return ""
 
-    stdout = result.stdout.strip()
-    stderr = result.stderr.strip()
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            if constants.Platforms.CURRENT == constants.Platforms.WINDOWS:
+                process.kill()
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        process.communicate()
+        raise TimeoutError(f"{command} timed out after {timeout} seconds")
+
+    encoding = context.config.run.encoding or "utf-8"
+    stdout = stdout.decode(encoding, errors="replace").strip()
+    stderr = stderr.decode(encoding, errors="replace").strip()
 
     return stdout or stderr
 
 
+# Gets the absolute working directory of the context, accounting for uses of cd, without changing
+# the process' one, so the helpers resolving paths against it are thread-safe and re-entrant.
+def __cwd(context: Context) -> str:
+    cwd = context.cwd
+    if not cwd:
+        return os.getcwd()
+
+    # Pyinvoke escapes the spaces of the cd paths for the shell
+    return os.path.abspath(os.path.expanduser(cwd.replace("\\ ", " ")))
+
+
+# Resolves a path against the working directory of the context.
+def __resolve(context: Context, path: str) -> str:
+    return os.path.join(__cwd(context), os.path.expanduser(str(path)))
+
+
+# Gets a superinvoke setting from the invoke configuration (superinvoke.<key>), keys are dot separated.
+def setting(context: Context, key: str, default: Any = None) -> Any:
+    value = context.config.get("superinvoke", None)
+
+    for part in key.split("."):
+        if value is None or not hasattr(value, "get"):
+            return default
+        value = value.get(part, None)
+
+    return default if value is None else value
+
+
+# Memoized version results of has for the lifetime of the process, keyed by
+# (program, version, PATH, binary mtime), and their persisted counterpart.
+__HAS_CACHE: Dict[tuple, bool] = {}
+__HAS_LOCK = threading.Lock()
+
+
+# Gets the memoization key of a program, which changes whenever the PATH or the program's binary change.
+def __has_key(program: str, version: Optional[str]) -> tuple:
+    path = os.environ.get("PATH", "")
+    location = utils.which(program)
+
+    try:
+        mtime = os.stat(location).st_mtime_ns if location else None
+    except OSError:
+        mtime = None
+
+    return (program, version or "", path, mtime)
+
+
+def __has_digest(key: tuple) -> str:
+    return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+
 # Checks whether a certain version of a program is installed. Semver expressions can be used.
-def has(context: Context, program: str, version: Optional[str] = None) -> bool:
-    if version:
-        return (  # noqa: BLK100
-            utils.has_compatible_version(context.attempt(f"{program} --version"), version)
-            or utils.has_compatible_version(context.attempt(f"{program} version"), version)
-        )
+# Version results are memoized for the lifetime of the process and, if superinvoke.has.ttl is
+# set, persisted for that many seconds in the superinvoke cache.
+def has(context: Context, program: str, version: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+    program = str(program)
+
+    if not version:
+        return utils.which(program) is not None
+
+    key = __has_key(program, version)
+    result = __has_lookup(context, key)
+    if result is not None:
+        return result
+
+    # Programs that cannot be resolved are not executed at all, unless they include arguments
+    if key[3] is None and not any(char.isspace() for char in program):
+        result = False
     else:
-        result = context.attempt(f"which {program}")
-        return result and "not found" not in result
+        result = (  # noqa: BLK100
+            utils.has_compatible_version(context.attempt(f"{program} --version", timeout=timeout), version)
+            or utils.has_compatible_version(context.attempt(f"{program} version", timeout=timeout), version)
+        )
+
+    __has_store(context, key, result)
+
+    return result
+
+
+# Gets the memoized or persisted version result of has if any.
+def __has_lookup(context: Context, key: tuple) -> Optional[bool]:
+    ttl = setting(context, "has.ttl", 0)
+
+    with __HAS_LOCK:
+        if key in __HAS_CACHE:
+            return __HAS_CACHE[key]
+
+        if ttl:
+            entry = utils.read_json(utils.path(constants.Paths.HAS)).get(__has_digest(key))
+            if entry is not None and time.time() - entry[1] < ttl:
+                __HAS_CACHE[key] = entry[0]
+                return entry[0]
+
+    return None
+
+
+# Memoizes a version result of has and persists it if superinvoke.has.ttl is set.
+def __has_store(context: Context, key: tuple, result: bool) -> None:
+    ttl = setting(context, "has.ttl", 0)
+
+    with __HAS_LOCK:
+        __HAS_CACHE[key] = result
+
+        if ttl:
+            path = utils.path(constants.Paths.HAS)
+            now = time.time()
+
+            # Other processes may have persisted results meanwhile, expired ones are dropped
+            persisted = {k: v for k, v in utils.read_json(path).items() if now - v[1] < ttl}
+            persisted[__has_digest(key)] = [result, now]
+            utils.write_json_atomic(path, persisted)
+
+
+# Checks whether many programs are installed at once, resolving all of them from the same PATH index.
+def has_many(context: Context, programs: List[str]) -> Dict[str, bool]:
+    return {str(program): utils.which(program) is not None for program in programs}
+
+
+GIT_REV_PARSE = "git rev-parse --show-toplevel --absolute-git-dir --git-common-dir HEAD --abbrev-ref HEAD"
+
+GIT_DESCRIBE = "git describe --tags --long --always"
+
+GIT_SHA_REGEX = re.compile(r"^[0-9a-f]{40}(?:[0-9a-f]{24})?$")
+
+GIT_DESCRIBE_REGEX = re.compile(r"^(.+)-(\d+)-g([0-9a-f]+)$")
+
+
+# Snapshot of the state of the current repository.
+class Git:
+    repository: str
+    git_dir: str
+    common_dir: str
+    sha: str
+    commit: str
+    branch: str
+    tag: Optional[str]
+    latest_tag: Optional[str]
+
+    def __init__(self, rev_parse: str, describe: str, cwd: str):
+        lines = rev_parse.splitlines()
+        lines += [""] * (5 - len(lines))
+
+        self.repository = lines[0]
+        self.git_dir = lines[1]
+        # The common directory is relative to the working directory unless in a worktree
+        self.common_dir = os.path.join(cwd, lines[2]) if lines[2] else self.git_dir
+        self.sha = lines[3] if GIT_SHA_REGEX.match(lines[3]) else ""
+        self.branch = lines[4]
+
+        # Unborn branches cannot be resolved by rev-parse, so they are read from HEAD
+        if not self.sha and self.git_dir:
+            head = self._head(self.git_dir)
+            self.branch = head[len("ref: refs/heads/") :] if head.startswith("ref: refs/heads/") else ""
+
+        # Output of git describe --tags --long --always: <latest tag>-<distance>-g<commit> or <commit>
+        match = GIT_DESCRIBE_REGEX.match(describe.strip())
+        if match:
+            self.latest_tag = match.group(1)
+            self.tag = self.latest_tag if match.group(2) == "0" else None
+            self.commit = match.group(3)
+        else:
+            self.latest_tag = None
+            self.tag = None
+            abbreviated = describe.strip()
+            self.commit = abbreviated if abbreviated and self.sha.startswith(abbreviated) else self.sha[:7]
+
+    @staticmethod
+    def _head(git_dir: str) -> str:
+        try:
+            with open(os.path.join(git_dir, "HEAD"), "r") as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+
+
+# Git snapshots of each working directory, with the git directory and signature they were taken with.
+__GIT_CACHE: Dict[str, tuple] = {}
+__GIT_LOCK = threading.Lock()
+
+
+# Gets the signature of the repository state a snapshot depends on, which changes whenever HEAD
+# moves or switches, or tags are added or removed, without executing git.
+def __git_signature(git_dir: str, common_dir: str) -> tuple:
+    head = Git._head(git_dir)
+    paths = [
+        os.path.join(git_dir, "HEAD"),
+        os.path.join(common_dir, "packed-refs"),
+        os.path.join(common_dir, "refs", "tags"),
+    ]
+    if head.startswith("ref: "):
+        paths.append(os.path.join(common_dir, head[len("ref: ") :]))
+
+    stats = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+            stats.append((info.st_mtime_ns, info.st_size, info.st_ino))
+        except OSError:
+            stats.append(None)
+
+    return (head, *stats)
+
+
+def __git_cached(context: Context) -> Optional[Git]:
+    cwd = __cwd(context)
+
+    with __GIT_LOCK:
+        cached = __GIT_CACHE.get(cwd)
+
+    if cached is None or cached[0] != __git_signature(cached[1].git_dir, cached[1].common_dir):
+        return None
+
+    return cached[1]
+
+
+def __git_store(context: Context, git: Git) -> Git:
+    # Directories outside of a repository are not cached, as one could be created at any time
+    if git.git_dir:
+        cwd = __cwd(context)
+        with __GIT_LOCK:
+            __GIT_CACHE[cwd] = (__git_signature(git.git_dir, git.common_dir), git)
+
+    return git
+
+
+# Gets a snapshot of the current repository with two git invocations. The snapshot is cached for the
+# rest of the run and taken again when HEAD moves or switches, or tags are added or removed.
+def git(context: Context) -> Git:
+    cached = __git_cached(context)
+    if cached is not None:
+        return cached
+
+    outputs = []
+    for command in [GIT_REV_PARSE, GIT_DESCRIBE]:
+        try:
+            result = context.run(command, warn=True, hide="both", pty=False, in_stream=False)
+            outputs.append(result.stdout)
+        except Exception:
+            outputs.append("")
+
+    return __git_store(context, Git(*outputs, __cwd(context)))
 
 
 # Gets the root path of the current repository.
 def repository(context: Context) -> str:
-    return context.attempt("git rev-parse --show-toplevel")
+    return context.git().repository
 
 
 # Gets the current commit hash.
 def commit(context: Context) -> str:
-    return context.attempt("git rev-parse --short HEAD")
+    return context.git().commit
 
 
 # Gets the current branch name.
 def branch(context: Context) -> str:
-    return context.attempt("git rev-parse --abbrev-ref HEAD")
+    return context.git().branch
 
 
 # Gets the current or latest commit tag if any.
 def tag(context: Context, current: bool = True) -> Optional[str]:
-    if current:
-        result = context.attempt("git name-rev --name-only --tags HEAD").replace("^0", "")
+    snapshot = context.git()
+    return snapshot.tag if current else snapshot.latest_tag
+
+
+# Streams the paths of the files changed in the last N commits, or since base if specified, as git outputs
+# them (NUL delimited) so huge change sets are never held in memory. Nothing is yielded if git fails.
+# - paths: git pathspecs the changes are filtered by, globs included. Example: ["src/**/*.py", ":!docs"]
+# - filter: git diff-filter of the changes. Example: "ACMR" (no deletions)
+# - base: revision the changes are compared to instead of HEAD~N. Example: "origin/main"
+# - merge_base: compare to the merge base of base and HEAD, i.e. only the changes made since branching.
+# - worktree: include the staged and unstaged changes of the working tree.
+# - untracked: include untracked files not ignored by git.
+# - renames: whether renames are detected, otherwise both the old and new paths are yielded.
+def iter_changes(
+    context: Context,
+    scope: int = 1,
+    paths: Optional[List[str]] = None,
+    filter: Optional[str] = None,
+    base: Optional[str] = None,
+    merge_base: bool = False,
+    worktree: bool = False,
+    untracked: bool = False,
+    renames: bool = True,
+) -> Iterator[str]:
+    revision = base or f"HEAD~{scope}"
+    if merge_base and worktree:
+        # The working tree can only be compared to a single revision
+        revision = __git_output(context, ["git", "merge-base", revision, "HEAD"])
+        if not revision:
+            return
+    elif merge_base:
+        revision = f"{revision}...HEAD"
+
+    command = ["git", "diff", "-z", "--name-only", "--no-renames" if not renames else "--find-renames"]
+    if filter:
+        command.append(f"--diff-filter={filter}")
+    command += [revision] if worktree or merge_base else [revision, "HEAD"]
+    command += ["--", *(paths or [])]
+
+    seen = set() if untracked else None
+    for path in __git_stream(context, command):
+        if seen is not None:
+            seen.add(path)
+        yield path
+
+    if untracked:
+        command = ["git", "ls-files", "-z", "--others", "--exclude-standard", "--", *(paths or [])]
+        for path in __git_stream(context, command):
+            if path not in seen:
+                yield path
+
+
+# Gets the files changed in the last N commits, or since base if specified. See iter_changes.
+def changes(context: Context, scope: int = 1, **kwargs: Any) -> List[str]:
+    return [*iter_changes(context, scope, **kwargs)]
+
+
+# Runs a git command in the context directory yielding its NUL delimited output as it is read.
+def __git_stream(context: Context, command: List[str]) -> Iterator[str]:
+    encoding = context.config.run.encoding or "utf-8"
+
+    try:
+        process = subprocess.Popen(
+            command,
+            cwd=__cwd(context),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return
+
+    try:
+        pending = b""
+        for chunk in iter(lambda: process.stdout.read1(64 * 1024), b""):
+            *paths, pending = (pending + chunk).split(b"\0")
+            for path in paths:
+                if path:
+                    yield path.decode(encoding, errors="surrogateescape")
+
+        if pending:
+            yield pending.decode(encoding, errors="surrogateescape")
+    finally:
+        # The consumer may stop early, in which case the rest of the output is discarded
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
+
+# Runs a git command in the context directory returning its output, or nothing if it fails.
+def __git_output(context: Context, command: List[str]) -> str:
+    try:
+        result = subprocess.run(
+            command,
+            cwd=__cwd(context),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return ""
+
+    return result.stdout.decode(context.config.run.encoding or "utf-8").strip() if result.returncode == 0 else ""
+
+
+# Gets the collections affected by the changed files. Mapping associates paths or globs, matched like
+# task inputs, to the collection names they affect. Keyword arguments are passed to iter_changes.
+# Example: context.changed_collections({"services/api": "api", "libs/**": ["api", "worker"]}, base="origin/main")
+def changed_collections(context: Context, mapping: Dict[str, Any], **kwargs: Any) -> List[str]:
+    trie = utils.GlobTrie()
+    pending = set()
+
+    # Collections are owned with their position in the mapping, so they are returned in its order
+    position = 0
+    for pattern, collections in mapping.items():
+        for collection in [collections] if isinstance(collections, str) else collections:
+            trie.add(pattern, (position, collection))
+            pending.add(collection)
+            position += 1
+
+    affected: Dict[str, None] = {}
+    for path in iter_changes(context, **kwargs):
+        for _, collection in sorted(trie.match(path)):
+            affected.setdefault(collection, None)
+            pending.discard(collection)
+
+        # Every collection is already affected, the rest of the changes are not read
+        if not pending:
+            break
+
+    return [*affected]
+
+
+# Asynchronous counterparts of the command helpers, so tasks can gather many of them at once
+# with Context.gather. asyncio is imported where it is used as it is expensive to import.
+
+# Concurrency semaphore of each event loop, as semaphores cannot be shared across loops.
+__ASYNC_SEMAPHORES: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+# Gets the semaphore bounding the concurrent commands of the running event loop to superinvoke.async.limit.
+def __async_semaphore(context: Context):
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    semaphore = __ASYNC_SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, int(setting(context, "async.limit", 8))))
+        __ASYNC_SEMAPHORES[loop] = semaphore
+
+    return semaphore
+
+
+# Size of the chunks read from the process pipes. Pipes are read in chunks instead of lines,
+# so output lines are not limited by the asyncio stream buffer limit.
+__ASYNC_CHUNK_SIZE = 64 * 1024
+
+
+# Reads a process pipe until it is closed, echoing its output to a stream if any.
+async def __async_read(pipe, stream, encoding: str) -> str:
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    output = []
+
+    while True:
+        chunk = await pipe.read(__ASYNC_CHUNK_SIZE)
+
+        # Multibyte characters split between chunks are decoded once complete
+        text = decoder.decode(chunk, final=not chunk)
+        if text:
+            output.append(text)
+
+            if stream is not None:
+                stream.write(text)
+                stream.flush()
+
+        if not chunk:
+            break
+
+    return "".join(output)
+
+
+# Runs the specified command asynchronously like Context.run, with its output streamed unless hidden.
+# If a timeout is specified and the command exceeds it, its process group is killed and TimeoutError raised.
+async def arun(
+    context: Context, command: str, warn: bool = False, hide: Any = None, timeout: Optional[float] = None
+) -> "Result":
+    import asyncio
+
+    from invoke.exceptions import UnexpectedExit
+    from invoke.runners import Result, normalize_hide
+
+    hide = normalize_hide(hide)
+
+    # The shell is not set when neither COMSPEC nor SHELL are, falling back to the default one like Popen does
+    shell = context.config.run.shell or (
+        "cmd.exe" if constants.Platforms.CURRENT == constants.Platforms.WINDOWS else "/bin/sh"
+    )
+    encoding = context.config.run.encoding or "utf-8"
+
+    kwargs = {}
+    if constants.Platforms.CURRENT == constants.Platforms.WINDOWS:
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+
+    async with __async_semaphore(context):
+        with tracing.span(command, "arun"):
+            process = await asyncio.create_subprocess_exec(
+                shell,
+                "/c" if constants.Platforms.CURRENT == constants.Platforms.WINDOWS else "-c",
+                context._prefix_commands(command),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                **kwargs,
+            )
+
+            try:
+                stdout, stderr, _ = await asyncio.wait_for(
+                    asyncio.gather(
+                        __async_read(process.stdout, None if "stdout" in hide else sys.stdout, encoding),
+                        __async_read(process.stderr, None if "stderr" in hide else sys.stderr, encoding),
+                        process.wait(),
+                    ),
+                    timeout,
+                )
+            except BaseException as e:
+                # The command never outlives the helper, whatever interrupted it
+                try:
+                    if constants.Platforms.CURRENT == constants.Platforms.WINDOWS:
+                        process.kill()
+                    else:
+                        os.killpg(process.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+                await process.wait()
+
+                if isinstance(e, asyncio.TimeoutError):
+                    raise TimeoutError(f"{command} timed out after {timeout} seconds") from None
+                raise
+
+    result = Result(
+        stdout=stdout,
+        stderr=stderr,
+        encoding=encoding,
+        command=command,
+        shell=shell,
+        exited=process.returncode,
+        hide=hide,
+    )
+
+    if not warn and result.failed:
+        raise UnexpectedExit(result)
+
+    return result
+
+
+# Asynchronous counterpart of Context.attempt.
+async def aattempt(context: Context, command: str, timeout: Optional[float] = None) -> str:
+    try:
+        result = await arun(context, command, warn=True, hide="both", timeout=timeout)
+    except TimeoutError:
+        raise
+    except OSError:
+        # The command could not be started
+        return ""
+
+    return result.stdout.strip() or result.stderr.strip()
+
+
+# Asynchronous counterpart of Context.has, sharing its memoized results.
+async def ahas(context: Context, program: str, version: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+    program = str(program)
+
+    if not version:
+        return utils.which(program) is not None
+
+    key = __has_key(program, version)
+    result = __has_lookup(context, key)
+    if result is not None:
+        return result
+
+    # Programs that cannot be resolved are not executed at all, unless they include arguments
+    if key[3] is None and not any(char.isspace() for char in program):
+        result = False
     else:
-        result = context.attempt("git describe --tags --abbrev=0").replace("^0", "")
+        result = (  # noqa: BLK100
+            utils.has_compatible_version(await aattempt(context, f"{program} --version", timeout=timeout), version)
+            or utils.has_compatible_version(await aattempt(context, f"{program} version", timeout=timeout), version)
+        )
 
-    if not result or "undefined" in result or "fatal" in result:
-        result = None
+    __has_store(context, key, result)
 
     return result
 
 
-# Gets the N last file changed.
-def changes(context: Context, scope: int = 1) -> List[str]:
-    return context.attempt(f"git diff --name-only HEAD HEAD~{scope}").split("\n")
+# Asynchronous counterpart of Context.git.
+async def agit(context: Context) -> Git:
+    import asyncio
+
+    cached = __git_cached(context)
+    if cached is not None:
+        return cached
+
+    results = await asyncio.gather(
+        arun(context, GIT_REV_PARSE, warn=True, hide="both"),
+        arun(context, GIT_DESCRIBE, warn=True, hide="both"),
+        return_exceptions=True,
+    )
+
+    outputs = [result.stdout if hasattr(result, "stdout") else "" for result in results]
+
+    return __git_store(context, Git(*outputs, __cwd(context)))
+
+
+# Asynchronous counterpart of Context.repository.
+async def arepository(context: Context) -> str:
+    return (await agit(context)).repository
+
+
+# Asynchronous counterpart of Context.commit.
+async def acommit(context: Context) -> str:
+    return (await agit(context)).commit
+
+
+# Asynchronous counterpart of Context.branch.
+async def abranch(context: Context) -> str:
+    return (await agit(context)).branch
+
+
+# Asynchronous counterpart of Context.tag.
+async def atag(context: Context, current: bool = True) -> Optional[str]:
+    snapshot = await agit(context)
+    return snapshot.tag if current else snapshot.latest_tag
+
+
+# Asynchronous counterpart of Context.changes.
+async def achanges(context: Context, scope: int = 1, **kwargs: Any) -> List[str]:
+    import asyncio
+
+    return await asyncio.get_running_loop().run_in_executor(None, lambda: changes(context, scope, **kwargs))
+
+
+# Asynchronous counterpart of Context.download, the download runs in a separate thread.
+async def adownload(context: Context, url: str, path: str) -> None:
+    import asyncio
+
+    path = __resolve(context, path)
+
+    await asyncio.get_running_loop().run_in_executor(None, utils.download, url, path)
+
+
+# Runs many awaitables of the asynchronous helpers at once and returns their results in order.
+# Example: commit, has_go = context.gather(context.acommit(), context.ahas("go", "^1.21"))
+def gather(context: Context, *awaitables: Awaitable, return_exceptions: bool = False) -> List[Any]:
+    import asyncio
+
+    async def main() -> List[Any]:
+        return await asyncio.gather(*awaitables, return_exceptions=return_exceptions)
+
+    return asyncio.run(main())
 
 
 # TODO: CRUD for files and directories:
@@ -122,87 +771,42 @@ def changes(context: Context, scope: int = 1) -> List[str]:
 
 # Creates a file or a directory in the specified path.
 def create(context: Context, path: str, data: List[str] = [""], dir: bool = False) -> None:
-    prev_cwd = os.getcwd()
-    if context.cwd:
-        os.chdir(context.cwd)
-
-    utils.create(path, data, dir=dir)
-
-    os.chdir(prev_cwd)
+    utils.create(__resolve(context, path), data, dir=dir)
 
 
 # Reads a file in the specified path.
 def read(context: Context, path: str) -> List[str]:
-    prev_cwd = os.getcwd()
-    if context.cwd:
-        os.chdir(context.cwd)
-
-    result = utils.read(path)
-
-    os.chdir(prev_cwd)
-
-    return result
+    return utils.read(__resolve(context, path))
 
 
 # Checks if the specified path exists and whether it is a file or a directory.
 def exists(context: Context, path: str) -> Optional[Literal["file", "dir"]]:
-    prev_cwd = os.getcwd()
-    if context.cwd:
-        os.chdir(context.cwd)
-
-    result = utils.exists(path)
-
-    os.chdir(prev_cwd)
-
-    return result
+    return utils.exists(__resolve(context, path))
 
 
 # Moves a file or a directory to the specified path.
 def move(context: Context, source_path: str, dest_path: str) -> None:
-    prev_cwd = os.getcwd()
-    if context.cwd:
-        os.chdir(context.cwd)
-
-    utils.move(source_path, dest_path)
-
-    os.chdir(prev_cwd)
+    utils.move(__resolve(context, source_path), __resolve(context, dest_path))
 
 
 # Removes a file or a directory in the specified path.
 def remove(context: Context, path: str, dir: bool = False) -> None:
-    prev_cwd = os.getcwd()
-    if context.cwd:
-        os.chdir(context.cwd)
-
-    utils.remove(path, dir=dir)
-
-    os.chdir(prev_cwd)
+    utils.remove(__resolve(context, path), dir=dir)
 
 
 # Extracts a zip, tar, gztar, bztar, or xztar file in the specified path.
 def extract(context: Context, source_path: str, dest_path: str) -> None:
-    prev_cwd = os.getcwd()
-    if context.cwd:
-        os.chdir(context.cwd)
-
-    utils.extract(source_path, dest_path)
-
-    os.chdir(prev_cwd)
+    utils.extract(__resolve(context, source_path), __resolve(context, dest_path))
 
 
 # Downloads a file to the specified path.
 def download(context: Context, url: str, path: str) -> None:
-    prev_cwd = os.getcwd()
-    if context.cwd:
-        os.chdir(context.cwd)
-
-    utils.download(url, path)
-
-    os.chdir(prev_cwd)
+    utils.download(url, __resolve(context, path))
 
 
 # Extends Pyinvoke's Context methods.
 def init() -> None:
+    Context.run = run
     Context.print = staticmethod(print)
     Context.input = staticmethod(input)
     Context.fail = staticmethod(fail)
@@ -210,12 +814,27 @@ def init() -> None:
     Context.info = staticmethod(info)
     Context.warn = staticmethod(warn)
     Context.attempt = attempt
+    Context.setting = setting
     Context.has = has
+    Context.has_many = has_many
+    Context.arun = arun
+    Context.aattempt = aattempt
+    Context.ahas = ahas
+    Context.gather = gather
+    Context.git = git
     Context.repository = repository
     Context.commit = commit
     Context.branch = branch
     Context.tag = tag
     Context.changes = changes
+    Context.iter_changes = iter_changes
+    Context.changed_collections = changed_collections
+    Context.agit = agit
+    Context.arepository = arepository
+    Context.acommit = acommit
+    Context.abranch = abranch
+    Context.atag = atag
+    Context.achanges = achanges
     Context.create = create
     Context.read = read
     Context.exists = exists
@@ -223,3 +842,4 @@ def init() -> None:
     Context.remove = remove
     Context.extract = extract
     Context.download = download
+    Context.adownload = adownload
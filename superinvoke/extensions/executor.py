@@ -0,0 +1,287 @@
+import io
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Set, Tuple
+
+from invoke.context import Context
+from invoke.executor import Executor
+from invoke.runners import normalize_hide
+from invoke.tasks import Call, Task
+
+from .. import tracing
+from .task import tools_hook
+
+__expand_calls = Executor.expand_calls
+__execute = Executor.execute
+__context_run = Context._run
+__call = Task.__call__
+
+# Serializes the writes of the buffered output of concurrently executed calls.
+__output_lock = threading.Lock()
+
+
+# Expands the pre and post tasks of the calls to execute, merging all the tool pre hooks into
+# a single one placed before the first of them. This way, each required tool of the whole
+# invoke run is checked only once and all the missing ones are installed in a single batch.
+def expand_calls(self, calls):
+    calls = __expand_calls(self, calls)
+
+    hooks = [call for call in calls if getattr(call.task, "tools", None) is not None]
+    if len(hooks) <= 1:
+        return calls
+
+    merged = __merge_hooks(hooks)
+    hooks = {id(hook) for hook in hooks}
+
+    expanded = []
+    for call in calls:
+        if id(call) not in hooks:
+            expanded.append(call)
+        elif merged is not None:
+            expanded.append(merged)
+            merged = None
+
+    return expanded
+
+
+def __merge_hooks(hooks: List[Call]) -> Call:
+    # Installing a tool takes precedence over the default mode, which takes precedence over checking it
+    precedence = {"install": 2, None: 1, "check": 0}
+    tools = {}
+    for hook in hooks:
+        for tool, mode in hook.task.tools.items():
+            if tool not in tools or precedence[mode] > precedence[tools[tool]]:
+                tools[tool] = mode
+
+    return Call(task=tools_hook(tools))
+
+
+# Executes the calls, and their pre and post tasks, concurrently in up to superinvoke.jobs
+# threads (which can also be set with INVOKE_SUPERINVOKE_JOBS). Calls are run as a graph
+# where each call waits for its pre tasks and post tasks wait for their call, so calls that
+# do not depend on each other run side by side. The output of each call is buffered and
+# written as a whole when it finishes, and a failure cancels the calls not started yet.
+# With a single job, the default, calls are executed serially as Pyinvoke does.
+def execute(self, *tasks):
+    config = __config(self)
+
+    # Profiling can also be enabled with the superinvoke.profile setting, besides SUPERINVOKE_PROFILE
+    tracing.enable(config.get("superinvoke", {}).get("profile", ""))
+
+    try:
+        jobs = int(config.superinvoke.jobs)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        jobs = 1
+
+    # Nested executions, like the ones run from a task, are executed serially within their task
+    if jobs <= 1 or isinstance(sys.stdout, _BufferedStream) and sys.stdout.buffering:
+        return __execute(self, *tasks)
+
+    calls = self.normalize(tasks)
+    direct = list(calls)
+    nodes, dependencies = __graph(self, calls)
+
+    results = {}
+    pending, running, done = set(range(len(nodes))), {}, set()
+    failure = None
+
+    with __buffered() as (stdout, stderr), ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            # Calls are started in the order they would be executed serially
+            for index in sorted(pending):
+                if len(running) >= jobs:
+                    break
+
+                if dependencies[index] <= done:
+                    pending.discard(index)
+                    future = pool.submit(__execute_call, self, nodes[index], nodes[index] in direct, stdout, stderr)
+                    running[future] = index
+
+            if not running:
+                raise ValueError(f"Circular dependency between tasks: {', '.join(nodes[i].task.name for i in pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = running.pop(future)
+
+                try:
+                    results[nodes[index].task] = future.result()
+                    done.add(index)
+                except BaseException as error:
+                    if failure is None:
+                        failure = error
+
+                    # Running calls cannot be interrupted, but no other call is started
+                    pending.clear()
+
+    if failure is not None:
+        raise failure
+
+    return results
+
+
+# Gets the configuration of the root collection, to read the execution settings from.
+def __config(self):
+    config = self.config.clone()
+    config.load_collection(self.collection.configuration())
+    config.load_shell_env()
+
+    return config
+
+
+# Calls a task, measured when profiling.
+def call(self, *args, **kwargs):
+    with tracing.span(self.name, "task"):
+        return __call(self, *args, **kwargs)
+
+
+# Builds the graph of the calls to execute, returning its deduplicated calls and the indexes
+# of the calls each of them depends on. Tool pre hooks are merged into a single call.
+def __graph(self, calls: List[Call]) -> Tuple[List[Call], List[Set[int]]]:
+    # The expanded calls include a single tool pre hook, merged from all the others
+    merged = next((call for call in self.expand_calls(calls) if getattr(call.task, "tools", None) is not None), None)
+
+    nodes: List[Call] = []
+    dependencies: List[Set[int]] = []
+    visited: Set[int] = set()
+
+    def visit(call) -> int:
+        if isinstance(call, Task):
+            call = Call(task=call)
+
+        if merged is not None and getattr(call.task, "tools", None) is not None:
+            call = merged
+
+        # Calls are not hashable, but the same task with the same arguments is the same call
+        index = next((index for index, node in enumerate(nodes) if node == call), None)
+        if index is None:
+            nodes.append(call)
+            dependencies.append(set())
+            index = len(nodes) - 1
+
+        if index in visited:
+            return index
+        visited.add(index)
+
+        for pre in call.pre:
+            dependencies[index].add(visit(pre))
+
+        for post in call.post:
+            dependencies[visit(post)].add(index)
+
+        dependencies[index].discard(index)
+
+        return index
+
+    for call in calls:
+        visit(call)
+
+    return nodes, dependencies
+
+
+# Executes a single call with its own copy of the configuration, buffering its output.
+def __execute_call(self, call: Call, autoprint: bool, stdout: "_BufferedStream", stderr: "_BufferedStream"):
+    stdout.start()
+    stderr.start()
+
+    try:
+        config = self.config.clone()
+        config.load_collection(self.collection.configuration(call.called_as))
+        config.load_shell_env()
+
+        # Concurrent commands cannot share the standard input
+        config.run.in_stream = False
+
+        context = call.make_context(config)
+        result = call.task(context, *call.args, **call.kwargs)
+
+        if autoprint and call.autoprint:
+            print(result)
+
+        return result
+    finally:
+        with __output_lock:
+            stdout.stop()
+            stderr.stop()
+
+
+# Hands the buffers of the call being executed to the commands it runs, as their output is written
+# from their own threads. Hidden streams are not handed, as Pyinvoke never hides a given stream.
+def _run(self, runner, command, **kwargs):
+    hide = normalize_hide(kwargs.get("hide", self.config.run.hide))
+
+    for name, stream in [("out", sys.stdout), ("err", sys.stderr)]:
+        if not isinstance(stream, _BufferedStream) or not stream.buffering or f"std{name}" in hide:
+            continue
+
+        if kwargs.get(f"{name}_stream", self.config.run.get(f"{name}_stream")) is None:
+            kwargs[f"{name}_stream"] = stream.buffer
+
+    return __context_run(self, runner, command, **kwargs)
+
+
+# Replaces the standard streams with buffered ones while calls are executed concurrently.
+@contextmanager
+def __buffered() -> Iterator[Tuple["_BufferedStream", "_BufferedStream"]]:
+    streams = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _BufferedStream(sys.stdout), _BufferedStream(sys.stderr)
+
+    try:
+        yield sys.stdout, sys.stderr
+    finally:
+        sys.stdout, sys.stderr = streams
+
+
+# Standard stream that buffers the writes of the threads executing a call until it finishes.
+# It is never reported as a terminal, as concurrent calls cannot share it for live displays.
+class _BufferedStream:
+    def __init__(self, stream) -> None:
+        self._stream = stream
+        self._local = threading.local()
+
+    @property
+    def buffering(self) -> bool:
+        return self.buffer is not None
+
+    # Buffer of the current thread.
+    @property
+    def buffer(self) -> Optional[io.StringIO]:
+        return getattr(self._local, "buffer", None)
+
+    def start(self) -> None:
+        self._local.buffer = io.StringIO()
+
+    # Writes the buffered output of the current thread to the underlying stream.
+    def stop(self) -> None:
+        buffer, self._local.buffer = self.buffer, None
+        if buffer is None:
+            return
+
+        self._stream.write(buffer.getvalue())
+        self._stream.flush()
+
+    def write(self, data: str) -> int:
+        if self.buffering:
+            return self.buffer.write(data)
+
+        return self._stream.write(data)
+
+    def flush(self) -> None:
+        if not self.buffering:
+            self._stream.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+
+# Extends Pyinvoke's Executor methods.
+def init() -> None:
+    Executor.expand_calls = expand_calls
+    Executor.execute = execute
+    Context._run = _run
+    Task.__call__ = call
@@ -1,31 +1,129 @@
-from typing import Tuple
+import functools
+import hashlib
+import os
+from typing import Callable, Dict, List, Optional, Tuple
 
 import invoke
 
 from .. import collections, objects
 
+# Ways of handling task's tool dependencies:
+# - install: automatically install missing tools.
+# - check: only check that tools are installed with a compatible version, failing otherwise.
+TOOLS_MODES = ["install", "check"]
+
 
 # Pyinvoke task wrapper, allows global task configuration.
+# - inputs: globs of the files the task depends on, relative to the repository root, used
+#   to select the tasks affected by a change set. Example: inputs=["api/**/*.go", "go.mod"]
+# - outputs: globs of the files the task generates, relative to the repository root. Tasks with outputs
+#   are skipped when their input files, arguments, environment and tool versions are the same as in
+#   their last successful run and their outputs have not been modified. Example: outputs=["api/gen/*.go"]
 def task(*args, **kwargs):
     args, kwargs = __pre_hook_tools(*args, **kwargs)
+    attributes = {
+        "inputs": [str(input) for input in kwargs.pop("inputs", [])],
+        "outputs": [str(output) for output in kwargs.pop("outputs", [])],
+    }
+
+    result = invoke.task(*args, **kwargs)
+
+    # Used as @task(...), invoke returns the decorator that creates the task
+    if not isinstance(result, invoke.Task):
+        decorator = result
+        return lambda body: __set_attributes(decorator(body), attributes)
+
+    return __set_attributes(result, attributes)
+
+
+def __set_attributes(task: invoke.Task, attributes: dict) -> invoke.Task:
+    for name, value in attributes.items():
+        setattr(task, name, value)
+
+    if task.outputs:
+        task.body = __fingerprinted(task, task.body)
+
+    return task
+
+
+# Wraps a task body so it is skipped when nothing it depends on has changed since its last successful
+# run. The fingerprint of the run is computed before executing it, so files modified by the task itself
+# are taken into account on the next run.
+def __fingerprinted(task: invoke.Task, body: Callable) -> Callable:
+    qualname = f"{body.__module__}.{body.__qualname__}"
+    key = f"{body.__name__}-{hashlib.sha256(qualname.encode('utf-8')).hexdigest()[:12]}"
+
+    @functools.wraps(body)
+    def run(context, *args, **kwargs):
+        from .. import main
+
+        root = context.repository() or os.getcwd()
+        envs = getattr(main, "__ENVS__", None)
+        manifest = objects.Manifest.All()
+        tools = sorted(tool for hook in task.pre for tool in getattr(hook, "tools", {}))
+
+        fingerprint = objects.Fingerprints.Compute(
+            inputs=objects.Fingerprints.Hashes(root, objects.Fingerprints.Scan(root, task.inputs)),
+            args=args,
+            kwargs=kwargs,
+            env=str(envs.Current) if envs is not None else None,
+            tools={tool: manifest.get(tool, {}).get("version") for tool in tools},
+        )
 
-    return invoke.task(*args, **kwargs)
+        last = objects.Fingerprints.Get(key)
+        if last is not None and last.get("fingerprint") == fingerprint:
+            outputs = objects.Fingerprints.Scan(root, task.outputs)
+            if outputs and last.get("outputs") == outputs:
+                context.info(f"{task.name} is up to date")
+                return None
 
+        # A failed run may have partially overwritten the outputs of the last successful one
+        objects.Fingerprints.Forget(key)
 
-# TODO: Option to only check if task's required tools are installed
-# with the correct version, but not automatically install them.
+        result = body(context, *args, **kwargs)
 
-# Pre hook task's tool dependencies to automatically install them.
+        outputs = objects.Fingerprints.Scan(root, task.outputs)
+        objects.Fingerprints.Record(key, fingerprint, outputs)
+
+        return result
+
+    return run
+
+
+# Creates a task that installs or checks the specified tools. Its tools are kept in the task, mapped
+# to their mode, so the executor can merge the pre hooks of a whole invoke run into a single one.
+# Tools without mode use the superinvoke.tools.mode setting, which defaults to install.
+def tools_hook(tools: Dict[str, Optional[str]]) -> invoke.Task:
+    @invoke.task(name=f"pre_hook_tools_{'_'.join(tools)}")
+    def pre_hook(context):
+        default = context.setting("tools.mode", "install")
+        modes = {tool: mode or default for tool, mode in tools.items()}
+
+        check = [tool for tool, mode in modes.items() if mode == "check"]
+        if check:
+            collections.tool.verify(context, include=",".join(check), exclude="")
+
+        install = [tool for tool, mode in modes.items() if mode != "check"]
+        if install:
+            collections.tool.install(context, include=",".join(install), exclude="", yes=True)
+
+    pre_hook.tools = tools
+
+    return pre_hook
+
+
+# Pre hook task's tool dependencies to automatically install them, or to only check
+# them when the task's tools_mode (or the superinvoke.tools.mode setting) is check.
 def __pre_hook_tools(*args, **kwargs) -> Tuple[list, dict]:
-    tools = [tool.name if type(tool) == objects.Tool else str(tool) for tool in kwargs.get("tools", [])]
+    tools: List[str] = [tool.name if type(tool) == objects.Tool else str(tool) for tool in kwargs.get("tools", [])]
+    mode: Optional[str] = kwargs.pop("tools_mode", None)
 
-    if tools:
+    if mode is not None and mode not in TOOLS_MODES:
+        raise ValueError(f"{mode} is not a valid tools mode, use one of: {', '.join(TOOLS_MODES)}")
 
-        @invoke.task(name=f"pre_hook_tools_{'_'.join(tools)}")
-        def pre_hook(context):
-            collections.tool.install(context, include=",".join(tools), exclude="", yes=True)
+    if tools:
+        kwargs["pre"] = [*(kwargs.get("pre", [])), tools_hook({tool: mode for tool in tools})]
 
-        kwargs["pre"] = [*(kwargs.get("pre", [])), pre_hook]
-        kwargs.pop("tools")
+    kwargs.pop("tools", None)
 
     return args, kwargs
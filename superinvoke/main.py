@@ -4,7 +4,7 @@ from typing import Optional
 from invoke import Collection
 
 from . import collections, objects
-from .extensions import context
+from .extensions import context, executor
 
 
 # Superinvoke root collection initialization.
@@ -18,27 +18,57 @@ def init(tools: Optional[objects.Tools] = None, envs: Optional[objects.Envs] = N
         __ENVS__ = envs
 
     context.init()
+    executor.init()
 
     # Root collection
+    global __ROOT__
     root = Collection()
+    __ROOT__ = root
     root.configure({  # noqa: BLK100
         "run": {
             "shell": os.environ.get("COMSPEC", os.environ.get("SHELL")),
             "encoding": "utf-8"
+        },
+        "superinvoke": {
+            "has": {
+                # Seconds to persist Context.has results in the superinvoke cache (0 disables it)
+                "ttl": 0
+            },
+            "tools": {
+                # How task's tool dependencies are handled: install or check
+                "mode": "install"
+            },
+            # Maximum number of tasks executed concurrently, independent pre and post tasks run side by side
+            "jobs": 1,
+            # Print a timing summary at exit (1), also writing a Chrome trace to the given path (trace.json)
+            "profile": "",
+            "async": {
+                # Maximum number of commands run concurrently by the asynchronous context helpers
+                "limit": 8
+            }
         }
     })
     root.add_task(collections.misc.help)
     root.add_task(collections.misc.version)
+    root.add_task(collections.misc.affected)
 
     if tools:
         # Tool collection
         tool = Collection()
         tool.add_task(collections.tool.install)
         tool.add_task(collections.tool.list)
+        tool.add_task(collections.tool.lock)
         tool.add_task(collections.tool.remove)
         tool.add_task(collections.tool.run)
         root.add_collection(tool, name="tool")
 
+        # Tool artifact cache collection
+        cache = Collection()
+        cache.add_task(collections.cache.stats)
+        cache.add_task(collections.cache.prune)
+        cache.add_task(collections.cache.clear)
+        tool.add_collection(cache, name="cache")
+
     if envs:
         # Environment collection
         env = Collection()
@@ -0,0 +1,381 @@
+import base64
+import hashlib
+import http.client
+import os
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import utils
+
+# Size of the blocks read from responses.
+CHUNK_SIZE = 1024 * 1024
+
+# Artifacts of at least this size are fetched in parallel ranges when the server supports them.
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+
+# Number of parallel ranges large artifacts are split in.
+PARALLEL_CHUNKS = 4
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+# Raised when a download fails and should not be retried as is.
+class DownloadError(Exception):
+    pass
+
+
+# Raised when a download fails but may succeed if retried.
+class RetryableError(Exception):
+    pass
+
+
+# Raised when a downloaded file does not match its expected digest.
+class DigestError(DownloadError):
+    pass
+
+
+# Creates the hash of a digest in the form algorithm:hex, returning it with the expected hex value.
+def hasher(digest: str) -> Tuple[Any, str]:
+    algorithm, value = utils.parse_digest(digest)
+    return hashlib.new(algorithm), value
+
+
+# Wraps a stream hashing everything that is read from it.
+class HashingReader:
+    def __init__(self, stream, hash):
+        self.stream = stream
+        self.hash = hash
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.hash.update(data)
+        return data
+
+
+# HTTP(S) client with a keep-alive connection pool per host, so consecutive downloads from
+# the same hosts reuse their TCP and TLS sessions. Downloads are resumed from partial files
+# with range requests, retried with exponential backoff, and large artifacts can be fetched
+# in parallel ranges.
+class Session:
+    def __init__(
+        self,
+        retries: int = 5,
+        backoff: float = 0.5,
+        timeout: float = 30,
+        pool_size: int = 8,
+        parallel_threshold: int = PARALLEL_THRESHOLD,
+        parallel_chunks: int = PARALLEL_CHUNKS,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.parallel_threshold = parallel_threshold
+        self.parallel_chunks = parallel_chunks
+        self._pool: Dict[tuple, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl = ssl.create_default_context()
+
+    # Gets the connection pool key, connection target and proxy headers of an URL.
+    def _route(self, url: urllib.parse.SplitResult) -> Tuple[tuple, bool, Dict[str, str]]:
+        port = url.port or (443 if url.scheme == "https" else 80)
+
+        proxy = None
+        if not urllib.request.proxy_bypass(url.hostname or ""):
+            proxy = urllib.request.getproxies().get(url.scheme)
+
+        if not proxy:
+            return (url.scheme, url.hostname, port, None, None), False, {}
+
+        proxy = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+        headers = {}
+        if proxy.username:
+            credentials = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+            headers["Proxy-Authorization"] = f"Basic {base64.b64encode(credentials.encode()).decode()}"
+
+        key = (url.scheme, url.hostname, port, proxy.hostname, proxy.port or 80)
+
+        # Plain HTTP requests are sent to the proxy with the absolute URL, HTTPS ones are tunneled
+        return key, url.scheme == "http", headers
+
+    def _connect(self, key: tuple, headers: Dict[str, str]) -> http.client.HTTPConnection:
+        scheme, host, port, proxy_host, proxy_port = key
+        target_host, target_port = (proxy_host, proxy_port) if proxy_host else (host, port)
+
+        if scheme == "https":
+            connection = http.client.HTTPSConnection(target_host, target_port, timeout=self.timeout, context=self._ssl)
+            if proxy_host:
+                connection.set_tunnel(host, port, headers=headers)
+        else:
+            connection = http.client.HTTPConnection(target_host, target_port, timeout=self.timeout)
+
+        return connection
+
+    def _acquire(self, key: tuple, headers: Dict[str, str]) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._pool.get(key)
+            if idle:
+                return idle.pop(), True
+
+        return self._connect(key, headers), False
+
+    def _release(self, key: tuple, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._pool.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(connection)
+                return
+
+        connection.close()
+
+    # Closes every idle connection of the pool.
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, {}
+
+        for idle in pool.values():
+            for connection in idle:
+                connection.close()
+
+    # Sends a GET request following redirects, yielding the final response. The connection
+    # goes back to the pool once the response has been fully read.
+    @contextmanager
+    def request(self, url: str, headers: Optional[Dict[str, str]] = None) -> Iterator[http.client.HTTPResponse]:
+        for _ in range(10):
+            split = urllib.parse.urlsplit(url)
+            if split.scheme not in ["http", "https"]:
+                raise DownloadError(f"Unsupported URL {url}")
+
+            key, absolute, proxy_headers = self._route(split)
+            target = url if absolute else urllib.parse.urlunsplit(("", "", split.path or "/", split.query, ""))
+            request_headers = {
+                "User-Agent": "superinvoke",
+                "Accept-Encoding": "identity",
+                **(proxy_headers if absolute else {}),
+                **(headers or {}),
+            }
+
+            connection, reused = self._acquire(key, proxy_headers)
+            try:
+                connection.request("GET", target, headers=request_headers)
+                response = connection.getresponse()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                # Idle connections may have been closed by the server in the meantime
+                if reused:
+                    continue
+                raise RetryableError(f"Cannot connect to {url}: {e}") from e
+
+            if response.status in REDIRECT_STATUSES and response.getheader("Location"):
+                response.read()
+                self._release(key, connection) if not response.will_close else connection.close()
+                url = urllib.parse.urljoin(url, response.getheader("Location"))
+                continue
+
+            # Final URL of the response, after following redirects
+            response.url = url
+
+            try:
+                yield response
+            except BaseException:
+                connection.close()
+                raise
+
+            if response.isclosed() and not response.will_close:
+                self._release(key, connection)
+            else:
+                connection.close()
+            return
+
+        raise DownloadError(f"Too many redirects for {url}")
+
+    # Retries an action with exponential backoff while it raises RetryableError.
+    def _retry(self, action, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return action(*args)
+            except RetryableError:
+                if attempt >= self.retries:
+                    raise
+                time.sleep(min(self.backoff * (2**attempt), 30))
+
+    # Downloads an URL to the specified path. The download is written to a partial file next to
+    # it, resumed from where it was left if interrupted, and renamed into place once completed.
+    # If a digest is specified, the download is hashed while it is written and discarded on mismatch.
+    def download(self, url: str, path: str, digest: Optional[str] = None) -> None:
+        part = f"{path}.part"
+        hash, expected = hasher(digest) if digest else (None, None)
+
+        result, ranges = self._retry(self._download, url, part, hash)
+        if ranges is not None:
+            final_url, size = ranges
+            self._download_parallel(final_url, part, size)
+
+            # Ranges are written out of order, so they can only be hashed once completed
+            result = self._hash_part(part, hash)
+
+        if result is not None and result.hexdigest() != expected:
+            os.remove(part)
+            raise DigestError(f"Checksum mismatch for {url}")
+
+        os.replace(part, path)
+
+    # Downloads or resumes an URL to a partial file, returning a copy of hash updated with its content.
+    # Large artifacts are not downloaded if the server supports range requests, returning their final
+    # URL and size instead so they are fetched in parallel ranges.
+    def _download(
+        self, url: str, part: str, hash: Optional[Any] = None
+    ) -> Tuple[Optional[Any], Optional[Tuple[str, int]]]:
+        offset = os.path.getsize(part) if os.path.isfile(part) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        hash = hash.copy() if hash is not None else None
+
+        try:
+            with self.request(url, headers) as response:
+                if response.status == 416 and offset:
+                    # The partial file is complete if its size matches the requested one
+                    response.read()
+                    total = response.getheader("Content-Range", "").rsplit("/", 1)[-1]
+                    if total.isdigit() and int(total) == offset:
+                        return self._hash_part(part, hash), None
+                    os.remove(part)
+                    raise RetryableError(f"Cannot resume {url}")
+
+                if response.status in RETRY_STATUSES:
+                    response.read()
+                    raise RetryableError(f"Cannot download {url}: HTTP {response.status}")
+
+                if response.status not in [200, 206]:
+                    response.read()
+                    raise DownloadError(f"Cannot download {url}: HTTP {response.status}")
+
+                if response.status == 206:
+                    self._hash_part(part, hash)
+                    mode = "ab"
+                elif not offset and self._parallel(response):
+                    return None, (response.url, response.length)
+                else:
+                    # Not resuming, or the server ignored the range and the partial file is downloaded again
+                    mode = "wb"
+
+                with open(part, mode) as f:
+                    for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                        f.write(chunk)
+                        if hash is not None:
+                            hash.update(chunk)
+
+                if response.length:
+                    raise RetryableError(f"Connection closed while downloading {url}")
+        except (OSError, http.client.HTTPException) as e:
+            raise RetryableError(f"Cannot download {url}: {e}") from e
+
+        return hash, None
+
+    # Checks whether the artifact of a full response is large enough to be fetched in parallel
+    # ranges and the server supports them, from its headers, so no extra request is needed.
+    def _parallel(self, response: http.client.HTTPResponse) -> bool:
+        return (
+            self.parallel_chunks > 1
+            and response.length is not None
+            and response.length >= self.parallel_threshold
+            and response.getheader("Accept-Ranges", "").strip().lower() == "bytes"
+        )
+
+    # Updates hash with the content already downloaded to a partial file.
+    def _hash_part(self, part: str, hash: Optional[Any]) -> Optional[Any]:
+        if hash is not None:
+            with open(part, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    hash.update(chunk)
+
+        return hash
+
+    def _download_parallel(self, url: str, part: str, size: int) -> None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        chunk = -(-size // self.parallel_chunks)
+        ranges = [[start, min(start + chunk, size) - 1] for start in range(0, size, chunk)]
+
+        with open(part, "wb") as f:
+            f.truncate(size)
+
+        def fetch(range_: list) -> None:
+            try:
+                with self.request(url, {"Range": f"bytes={range_[0]}-{range_[1]}"}) as response:
+                    if response.status in RETRY_STATUSES:
+                        response.read()
+                        raise RetryableError(f"Cannot download {url}: HTTP {response.status}")
+
+                    if response.status != 206:
+                        response.read()
+                        raise DownloadError(f"Cannot download {url} in ranges: HTTP {response.status}")
+
+                    # Progress is kept in the range so retries continue where they were left
+                    with open(part, "r+b") as f:
+                        f.seek(range_[0])
+                        for data in iter(lambda: response.read(CHUNK_SIZE), b""):
+                            f.write(data)
+                            range_[0] += len(data)
+
+                    if range_[0] <= range_[1]:
+                        raise RetryableError(f"Connection closed while downloading {url}")
+            except (OSError, http.client.HTTPException) as e:
+                raise RetryableError(f"Cannot download {url}: {e}") from e
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                for future in [executor.submit(self._retry, fetch, range_) for range_ in ranges]:
+                    future.result()
+        except BaseException:
+            # Ranges cannot be resumed from a partial file, so it is discarded
+            if os.path.isfile(part):
+                os.remove(part)
+            raise
+
+
+# Shared session, so connections are reused by every download of the process.
+session = Session()
+
+
+# Downloads an URL to the specified path.
+def download(url: str, path: str, digest: Optional[str] = None) -> None:
+    session.download(url, path, digest=digest)
+
+
+# Opens an URL as a stream of its body. Failures that may succeed if the stream is opened
+# again are raised as RetryableError. If a digest is specified, the stream is hashed while
+# it is read, the rest of the body is read on exit and DigestError is raised on mismatch.
+@contextmanager
+def stream(url: str, digest: Optional[str] = None) -> Iterator[Any]:
+    hash, expected = hasher(digest) if digest else (None, None)
+
+    with session.request(url) as response:
+        if response.status != 200:
+            response.read()
+            error = RetryableError if response.status in RETRY_STATUSES else DownloadError
+            raise error(f"Cannot download {url}: HTTP {response.status}")
+
+        try:
+            if hash is None:
+                yield response
+
+                # Drain the rest of the body, if small, so the connection can be reused
+                if response.length is not None and response.length <= CHUNK_SIZE:
+                    response.read()
+            else:
+                reader = HashingReader(response, hash)
+                yield reader
+
+                while reader.read(CHUNK_SIZE):
+                    pass
+        except (OSError, http.client.HTTPException) as e:
+            raise RetryableError(f"Cannot download {url}: {e}") from e
+
+    if hash is not None and hash.hexdigest() != expected:
+        raise DigestError(f"Checksum mismatch for {url}")
@@ -1,3 +1,7 @@
+from .cache import Cache
 from .common import Tags
 from .env import Env, Envs
+from .fingerprint import Fingerprints
+from .lockfile import Lockfile
+from .manifest import Manifest
 from .tool import Tool, Tools
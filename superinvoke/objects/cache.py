@@ -0,0 +1,175 @@
+import hashlib
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from .. import constants, utils
+
+# Default maximum size of the artifact cache in bytes (2 GiB).
+SIZE = 2 * 1024 * 1024 * 1024
+
+
+# Represents the content-addressed artifact cache shared across projects. Artifacts are keyed
+# by their expected digest when known, otherwise by their URL, and evicted in LRU order.
+class Cache:
+    _lock = threading.Lock()
+
+    @utils.classproperty
+    def Path(cls) -> str:
+        return utils.path(f"{constants.Paths.ARTIFACTS}/artifacts")
+
+    # Maximum size in bytes, can be overridden with SUPERINVOKE_CACHE_SIZE (0 disables the cache).
+    @utils.classproperty
+    def Size(cls) -> int:
+        try:
+            return int(os.environ.get("SUPERINVOKE_CACHE_SIZE", SIZE))
+        except ValueError:
+            return SIZE
+
+    @utils.classproperty
+    def Enabled(cls) -> bool:
+        return cls.Size > 0
+
+    @staticmethod
+    def Key(url: str, digest: Optional[str] = None) -> str:
+        if digest:
+            algorithm, value = utils.parse_digest(digest)
+            return f"{algorithm}-{value}"
+
+        return f"url-{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+    @classmethod
+    def Entry(cls, key: str) -> str:
+        return f"{cls.Path}/{key[-2:]}/{key}"
+
+    @classmethod
+    def Entries(cls) -> List[Tuple[str, int, float]]:
+        entries = []
+
+        if utils.exists(cls.Path) != "dir":
+            return entries
+
+        for dir in os.scandir(cls.Path):
+            if not dir.is_dir():
+                continue
+
+            for entry in os.scandir(dir.path):
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+
+                info = entry.stat()
+                entries.append((entry.path, info.st_size, info.st_mtime))
+
+        return entries
+
+    # Gets the path of the cached artifact of an URL, downloading it if it is not cached yet, to be
+    # used as a context manager. The artifact is locked until the context exits, so it cannot be
+    # evicted meanwhile by Prune from any process. Artifacts with a digest are verified while
+    # downloading and never cached on mismatch.
+    @classmethod
+    @contextmanager
+    def Open(cls, url: str, digest: Optional[str] = None) -> Iterator[str]:
+        key = cls.Key(url, digest)
+        entry = cls.Entry(key)
+
+        # Concurrent fetches of the same artifact, from any process, wait for the first one
+        with cls._locked(entry):
+            if not cls._hit(entry):
+                # Download next to the entry and rename atomically so readers
+                # never observe a partially written artifact.
+                tmp_path = f"{os.path.dirname(entry)}/.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    utils.download(url, tmp_path, digest=digest)
+                    os.replace(tmp_path, entry)
+                finally:
+                    if utils.exists(tmp_path) == "file":
+                        utils.remove(tmp_path)
+
+            yield entry
+
+    # Holds the lock of an entry, which is held while it is downloaded, read or evicted.
+    @staticmethod
+    @contextmanager
+    def _locked(entry: str) -> Iterator[None]:
+        with utils.file_lock(f"{os.path.dirname(entry)}/.{os.path.basename(entry)}.lock"):
+            yield
+
+    # Checks whether an entry is cached, marking it as recently used.
+    @staticmethod
+    def _hit(entry: str) -> bool:
+        try:
+            os.utime(entry)
+        except OSError:
+            return False
+
+        return True
+
+    # Downloads a file to the specified path going through the cache. Cached artifacts are
+    # copied, or hardlinked when the file will not be modified, without any network access.
+    @classmethod
+    def Fetch(cls, url: str, path: str, digest: Optional[str] = None, link: bool = False) -> None:
+        if not cls.Enabled:
+            utils.download(url, path, digest=digest)
+            return
+
+        with cls.Open(url, digest) as entry:
+            linked = False
+            if link:
+                try:
+                    os.link(entry, path)
+                    linked = True
+                except OSError:
+                    pass
+
+            if not linked:
+                shutil.copyfile(entry, path)
+
+        cls.Prune()
+
+    # Evicts least recently used artifacts until the cache fits in size bytes.
+    # Returns the number of evicted artifacts and their total size.
+    @classmethod
+    def Prune(cls, size: Optional[int] = None) -> Tuple[int, int]:
+        size = cls.Size if size is None else size
+        count, freed = 0, 0
+
+        # Prunes from other processes are serialized, as they would evict the same entries
+        with cls._lock, utils.file_lock(f"{cls.Path}/.prune.lock"):
+            entries = sorted(cls.Entries(), key=lambda entry: entry[2])
+            total = sum(entry[1] for entry in entries)
+
+            for path, entry_size, mtime in entries:
+                if total <= size:
+                    break
+
+                # Entries being read are evicted once released, unless they were used meanwhile
+                with cls._locked(path):
+                    try:
+                        if size > 0 and os.stat(path).st_mtime != mtime:
+                            continue
+                        utils.remove(path)
+                    except OSError:
+                        continue
+
+                total -= entry_size
+                count += 1
+                freed += entry_size
+
+        return count, freed
+
+    @classmethod
+    def Clear(cls) -> Tuple[int, int]:
+        return cls.Prune(size=0)
+
+    @classmethod
+    def Stats(cls) -> dict:
+        entries = cls.Entries()
+
+        return {
+            "path": cls.Path,
+            "count": len(entries),
+            "size": sum(entry[1] for entry in entries),
+            "limit": cls.Size,
+        }
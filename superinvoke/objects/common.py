@@ -1,24 +1,23 @@
 import fnmatch
-from typing import List
+import functools
+import os
+import re
+from typing import Any, Callable, Dict, List, Tuple
 
 from .. import utils
 
 
+# Compiles a glob pattern once, matching like fnmatch does in the current OS.
+@functools.lru_cache(maxsize=1024)
+def compile_glob(pattern: str) -> Callable[[str], Any]:
+    return re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+
+
 # Represents the list of available tags.
 class Tags(utils.StrEnum):
     @utils.classproperty
-    def All(cls) -> List[str]:
-        all = []
-
-        for tag in dir(cls):
-            if tag in ["All", "ALL"]:
-                continue
-
-            tag = getattr(cls, tag)
-            if isinstance(tag, Tags):
-                all.append(tag)
-
-        return all
+    def All(cls) -> Tuple["Tags", ...]:
+        return _tags(cls)
 
     @utils.classproperty
     def ALL(cls):
@@ -30,4 +29,94 @@ class Tags(utils.StrEnum):
 
     @classmethod
     def As(cls, tag: str) -> List[str]:
-        return [tag_ for tag_ in cls.All if fnmatch.filter([tag_], tag)]
+        if not utils.is_glob(tag):
+            return [tag_ for tag_ in cls.All if os.path.normcase(tag_) == os.path.normcase(tag)]
+
+        match = compile_glob(tag)
+        return [tag_ for tag_ in cls.All if match(os.path.normcase(tag_))]
+
+
+# Enumerations cannot be mutated, so their tags are only gathered once.
+@functools.lru_cache(maxsize=None)
+def _tags(cls) -> Tuple[Tags, ...]:
+    return tuple(cls[name] for name in sorted(cls._member_names_))
+
+
+# Index of the items of a registry by name and by tag.
+class Index:
+    all: tuple
+    names: Dict[str, tuple]
+    tags: Dict[str, tuple]
+    wildcards: tuple
+
+    def __init__(self, items: list):
+        self.all = tuple(items)
+
+        names: Dict[str, list] = {}
+        tags: Dict[str, list] = {}
+        for item in self.all:
+            names.setdefault(os.path.normcase(item.name), []).append(item)
+            for tag in {os.path.normcase(tag) for tag in item.tags}:
+                tags.setdefault(tag, []).append(item)
+
+        # Items tagged with every tag match any tag query, keeping the registry order
+        self.wildcards = tuple(item for item in self.all if Tags.ALL in item.tags)
+        if self.wildcards:
+            wildcards = {id(item) for item in self.wildcards}
+            for tag, items_ in tags.items():
+                tagged = {id(item) for item in items_} | wildcards
+                tags[tag] = [item for item in self.all if id(item) in tagged]
+
+        self.names = {name: tuple(items_) for name, items_ in names.items()}
+        self.tags = {tag: tuple(items_) for tag, items_ in tags.items()}
+
+    def by_name(self, name: str) -> list:
+        if not utils.is_glob(name):
+            return [*self.names.get(os.path.normcase(name), ())]
+
+        match = compile_glob(name)
+        return [item for item in self.all if match(os.path.normcase(item.name))]
+
+    def by_tag(self, tag: str) -> list:
+        if not utils.is_glob(tag):
+            return [*self.tags.get(os.path.normcase(tag), self.wildcards)]
+
+        match = compile_glob(tag)
+        return [
+            item
+            for item in self.all
+            if Tags.ALL in item.tags or any(match(os.path.normcase(tag_)) for tag_ in item.tags)
+        ]
+
+
+# Metaclass of registries (Tools, Envs...), which are classes whose attributes of a certain
+# type are its items. The index is built once per class and rebuilt only after a mutation.
+class Registry(type):
+    _generation = 0
+
+    def __setattr__(cls, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        Registry._generation += 1
+
+    def __delattr__(cls, name: str) -> None:
+        super().__delattr__(name)
+        Registry._generation += 1
+
+    def _index(cls, kind: type) -> Index:
+        index = cls.__dict__.get("_registry_index")
+        if index is not None and index[0] == Registry._generation:
+            return index[1]
+
+        # Gather items without triggering class properties, children override their parents
+        items: Dict[str, Any] = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, kind):
+                    items[name] = value
+                elif name in items:
+                    del items[name]
+
+        index = Index([items[name] for name in sorted(items)])
+        type.__setattr__(cls, "_registry_index", (Registry._generation, index))
+
+        return index
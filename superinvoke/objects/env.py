@@ -1,8 +1,7 @@
-import fnmatch
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, List, Optional, Tuple
 
 from .. import constants, utils
-from .common import Tags
+from .common import Registry, Tags
 
 
 # Represents an environment.
@@ -25,22 +24,12 @@ class Env:
 
 
 # Represents the list of available environments.
-class Envs:
+class Envs(metaclass=Registry):
     Default: Optional[Callable[[Any], Env]] = None
 
     @utils.classproperty
-    def All(cls) -> List[Env]:
-        all = []
-
-        for env in dir(cls):
-            if env in ["All", "Default", "Current"]:
-                continue
-
-            env = getattr(cls, env)
-            if isinstance(env, Env):
-                all.append(env)
-
-        return all
+    def All(cls) -> Tuple[Env, ...]:
+        return cls._index(Env).all
 
     @utils.classproperty
     def Current(cls) -> Optional[Env]:
@@ -55,8 +44,8 @@ class Envs:
 
     @classmethod
     def ByTag(cls, tag: str) -> List[Env]:
-        return [env for env in cls.All if fnmatch.filter(env.tags, tag) or Tags.ALL in env.tags]
+        return cls._index(Env).by_tag(tag)
 
     @classmethod
     def ByName(cls, name: str) -> List[Env]:
-        return [env for env in cls.All if fnmatch.filter([env.name], name)]
+        return cls._index(Env).by_name(name)
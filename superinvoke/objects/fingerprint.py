@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from .. import constants, utils
+
+# Directories never considered task inputs nor outputs.
+IGNORED_DIRS = {".git", ".hg", ".svn", constants.Paths.CACHE}
+
+# Files modified this close (in nanoseconds) to being hashed may be modified again without
+# changing their stat signature, so their hash is not reused on the next run.
+RACY_WINDOW = 2 * 1000 * 1000 * 1000
+
+
+# Represents the fingerprints of the last successful run of the tasks with declared inputs and
+# outputs, used to skip them when nothing they depend on has changed. Input files are hashed
+# incrementally: their hash is only computed again when their size or modification time changes.
+class Fingerprints:
+    _lock = threading.Lock()
+
+    @utils.classproperty
+    def Path(cls) -> str:
+        return utils.path(constants.Paths.FINGERPRINTS)
+
+    # Gets the stat signatures of the files under the root directory matching any of the glob patterns,
+    # by their path relative to it, as their size and modification time.
+    @staticmethod
+    def Scan(root: str, patterns: List[str]) -> Dict[str, List[int]]:
+        trie = utils.GlobTrie()
+        for pattern in patterns:
+            trie.add(pattern, True)
+
+        signatures = {}
+        for path, entry in trie.walk(root, ignore=IGNORED_DIRS):
+            try:
+                info = entry.stat()
+            except OSError:
+                continue
+
+            signatures[path] = [info.st_size, info.st_mtime_ns]
+
+        return dict(sorted(signatures.items()))
+
+    # Gets the sha256 of scanned files relative to the root directory, reusing the recorded hashes of
+    # the files whose signature has not changed, and records the ones that had to be computed.
+    @classmethod
+    def Hashes(cls, root: str, signatures: Dict[str, List[int]]) -> Dict[str, Optional[str]]:
+        known = cls._hashes()
+        hashes: Dict[str, Optional[str]] = {}
+        changes = {}
+        now = time.time_ns()
+
+        for file, signature in signatures.items():
+            path = os.path.join(root, file)
+
+            entry = known.get(path)
+            if entry is not None and entry[:2] == signature:
+                hashes[file] = entry[2]
+                continue
+
+            try:
+                hashes[file] = utils.digest(path)
+            except OSError:
+                hashes[file] = None
+                continue
+
+            if now - signature[1] > RACY_WINDOW:
+                changes[path] = [*signature, hashes[file]]
+
+        if changes:
+            with cls._locked():
+                known = dict(cls._hashes())
+                known.update(changes)
+                cls._write("files.json", known)
+
+        return hashes
+
+    # Computes the fingerprint of a task run from everything it depends on.
+    @staticmethod
+    def Compute(**parts) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    # Gets the recorded run of a task, with its fingerprint and the signatures of its outputs.
+    @classmethod
+    def Get(cls, key: str) -> Optional[dict]:
+        return utils.read_json(f"{cls.Path}/{key}.json") or None
+
+    @classmethod
+    def Record(cls, key: str, fingerprint: str, outputs: Dict[str, List[int]]) -> None:
+        with cls._locked():
+            cls._write(f"{key}.json", {"fingerprint": fingerprint, "outputs": outputs})
+
+    @classmethod
+    def Forget(cls, key: str) -> None:
+        with cls._locked():
+            path = f"{cls.Path}/{key}.json"
+            if utils.exists(path) == "file":
+                utils.remove(path)
+
+    # Recorded hashes of input files by absolute path, as their size, modification time and sha256.
+    @classmethod
+    def _hashes(cls) -> dict:
+        return utils.read_json(f"{cls.Path}/files.json")
+
+    # Serializes updates of the fingerprints across threads and processes.
+    @classmethod
+    @contextmanager
+    def _locked(cls) -> Iterator[None]:
+        with cls._lock, utils.file_lock(utils.path(f"{constants.Paths.LOCKS}/fingerprints.lock")):
+            yield
+
+    @classmethod
+    def _write(cls, name: str, data: dict) -> None:
+        utils.write_json_atomic(f"{cls.Path}/{name}", data)
@@ -0,0 +1,58 @@
+from typing import Optional
+
+from .. import constants, utils
+from .tool import Tool
+
+# Version of the lock file format.
+VERSION = 1
+
+
+# Represents the lock file of the project, which pins the exact version of each tool and the
+# URL, archive member and digest of its artifact in every platform. Locked tools are installed
+# and checked against the lock, without evaluating their version spec nor executing them.
+class Lockfile:
+    @classmethod
+    def All(cls) -> dict:
+        lock = utils.read_json(utils.path(constants.Paths.LOCK))
+
+        tools = lock.get("tools", {}) if lock.get("version") == VERSION else {}
+
+        return tools if isinstance(tools, dict) else {}
+
+    # Gets the lock entry of a tool, or None if it is not locked or its definition has changed
+    # since it was locked, in which case the lock does not apply until it is generated again.
+    @classmethod
+    def Get(cls, tool: Tool) -> Optional[dict]:
+        entry = cls.All().get(tool.name, None)
+        if not isinstance(entry, dict) or entry.get("spec") != tool.version or not entry.get("version"):
+            return None
+
+        platforms = entry.get("platforms", {})
+        for platform, link in tool.links.items():
+            locked = platforms.get(str(platform))
+            if not locked or locked.get("url") != link[0] or locked.get("member") != link[1]:
+                return None
+
+            if len(link) > 2 and link[2] and locked.get("digest") != ":".join(utils.parse_digest(link[2])):
+                return None
+
+        return entry
+
+    # Gets the locked version of a tool.
+    @classmethod
+    def Version(cls, tool: Tool) -> Optional[str]:
+        entry = cls.Get(tool)
+        return entry["version"] if entry is not None else None
+
+    # Gets the locked digest of the current platform's link artifact of a tool.
+    @classmethod
+    def Digest(cls, tool: Tool) -> Optional[str]:
+        entry = cls.Get(tool)
+        if entry is None:
+            return None
+
+        return entry.get("platforms", {}).get(str(constants.Platforms.CURRENT), {}).get("digest", None)
+
+    @classmethod
+    def Write(cls, tools: dict) -> None:
+        utils.write_json_atomic(utils.path(constants.Paths.LOCK), {"version": VERSION, "tools": tools}, indent=2)
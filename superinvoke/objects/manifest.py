@@ -0,0 +1,107 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .. import constants, utils
+from .lockfile import Lockfile
+from .tool import Tool
+
+
+# Represents the manifest of installed tools. It records the resolved version, the file signature,
+# the hash and the verified artifact digest of each managed tool so it can be checked without executing it.
+class Manifest:
+    _lock = threading.Lock()
+
+    # Gets the stat signature of a file, which changes whenever the file is replaced or modified.
+    @staticmethod
+    def Signature(path: str) -> Optional[dict]:
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+
+        return {"size": info.st_size, "mtime": info.st_mtime_ns, "inode": info.st_ino}
+
+    @classmethod
+    def All(cls) -> dict:
+        return utils.read_json(utils.path(constants.Paths.MANIFEST))
+
+    @classmethod
+    def Get(cls, tool: Tool) -> Optional[dict]:
+        return cls.All().get(tool.name, None)
+
+    # Checks whether a tool is installed with a compatible version from the manifest.
+    # Returns None when the manifest cannot tell, so the tool has to be executed.
+    # Locked tools must be installed with the exact locked version and artifact.
+    @classmethod
+    def Check(cls, tool: Tool) -> Optional[bool]:
+        entry = cls.Get(tool)
+        if entry is None:
+            return None
+
+        signature = cls.Signature(tool.path)
+        if signature is None:
+            return False
+
+        # The tool was installed from another artifact than the one currently pinned
+        digest = tool.digest or Lockfile.Digest(tool)
+        if digest and entry.get("digest") and entry["digest"] != digest:
+            return False
+
+        if signature != entry.get("signature"):
+            # Tools installed from a verified artifact are accepted if their hash has not changed,
+            # e.g. when restored from a CI cache, which changes their signature.
+            if not digest or entry.get("digest") != digest or utils.digest(tool.path) != entry.get("sha256"):
+                return None
+
+            cls.Record(tool, entry.get("version", ""), digest)
+
+        locked = Lockfile.Version(tool)
+        if locked is not None:
+            return entry.get("version") == locked
+
+        # Tools without a version spec are compatible with any version
+        if not tool.version:
+            return True
+
+        return utils.has_compatible_version(entry.get("version", ""), tool.version)
+
+    # Records the version of an installed tool, and the digest of the artifact it was installed from if verified.
+    @classmethod
+    def Record(cls, tool: Tool, version: str, digest: Optional[str] = None) -> None:
+        signature = cls.Signature(tool.path)
+        if signature is None:
+            return
+
+        entry = {
+            "name": tool.name,
+            "version": version,
+            "path": tool.path,
+            "signature": signature,
+            "sha256": utils.digest(tool.path),
+            "digest": digest,
+        }
+
+        with cls._locked():
+            tools = dict(cls.All())
+            tools[tool.name] = entry
+            cls._write(tools)
+
+    @classmethod
+    def Forget(cls, tool: Tool) -> None:
+        with cls._locked():
+            tools = dict(cls.All())
+            if tools.pop(tool.name, None) is not None:
+                cls._write(tools)
+
+    # Serializes updates of the manifest across threads and processes.
+    @classmethod
+    @contextmanager
+    def _locked(cls) -> Iterator[None]:
+        with cls._lock, utils.file_lock(utils.path(f"{constants.Paths.LOCKS}/manifest.lock")):
+            yield
+
+    @classmethod
+    def _write(cls, tools: dict) -> None:
+        utils.write_json_atomic(utils.path(constants.Paths.MANIFEST), tools, indent=2)
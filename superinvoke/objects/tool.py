@@ -1,8 +1,7 @@
-import fnmatch
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from .. import constants, utils
-from .common import Tags
+from .common import Registry, Tags
 
 
 # Represents an executable tool.
@@ -45,6 +44,16 @@ class Tool:
     def link(self) -> Optional[tuple]:
         return self.links.get(constants.Platforms.CURRENT, None)
 
+    # Expected digest of the current platform's link artifact, set as an optional third element
+    # in the form sha256:<hex> or sha512:<hex>. It is normalized to that form when set without algorithm.
+    @property
+    def digest(self) -> Optional[str]:
+        link = self.link
+        if link is None or len(link) < 3 or not link[2]:
+            return None
+
+        return ":".join(utils.parse_digest(link[2]))
+
     def __eq__(self, other: object) -> bool:
         return isinstance(other, Tool) and self.name == other.name and self.version == other.version
 
@@ -53,25 +62,15 @@ class Tool:
 
 
 # Represents the list of available tools.
-class Tools:
+class Tools(metaclass=Registry):
     @utils.classproperty
-    def All(cls) -> List[Tool]:
-        all = []
-
-        for tool in dir(cls):
-            if tool == "All":
-                continue
-
-            tool = getattr(cls, tool)
-            if isinstance(tool, Tool):
-                all.append(tool)
-
-        return all
+    def All(cls) -> Tuple[Tool, ...]:
+        return cls._index(Tool).all
 
     @classmethod
     def ByTag(cls, tag: str) -> List[Tool]:
-        return [tool for tool in cls.All if fnmatch.filter(tool.tags, tag) or Tags.ALL in tool.tags]
+        return cls._index(Tool).by_tag(tag)
 
     @classmethod
     def ByName(cls, name: str) -> List[Tool]:
-        return [tool for tool in cls.All if fnmatch.filter([tool.name], name)]
+        return cls._index(Tool).by_name(name)
@@ -0,0 +1,168 @@
+import atexit
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Values of SUPERINVOKE_PROFILE that only print the timing summary, any other one is the
+# path where the Chrome trace event JSON of the run is also written.
+SUMMARY_VALUES = {"1", "true", "yes", "on"}
+DISABLED_VALUES = {"", "0", "false", "no", "off"}
+
+# Number of rows of the timing summary.
+SUMMARY_ROWS = 30
+
+# Recorded spans, as their name, category, start and duration in nanoseconds, thread and arguments.
+# Lists are appended atomically, so spans can be recorded from any thread without locking.
+__SPANS: List[Tuple[str, str, int, int, int, Dict[str, Any]]] = []
+__ORIGIN = time.perf_counter_ns()
+__STATE = {"enabled": False, "output": None, "registered": False}
+__lock = threading.Lock()
+
+
+# Measured section of a superinvoke run.
+class _Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name: str, category: str, args: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, type, value, traceback) -> None:
+        end = time.perf_counter_ns()
+        if type is not None:
+            self.args["error"] = type.__name__
+
+        _record(self.name, self.category, self.start, end - self.start, self.args)
+
+
+# Span used while profiling is disabled, which measures nothing.
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, type, value, traceback) -> None:
+        pass
+
+
+__NULL_SPAN = _NullSpan()
+
+
+def _record(name: str, category: str, start: int, duration: int, args: Dict[str, Any]) -> None:
+    __SPANS.append((name, category, start, duration, threading.get_ident(), args))
+
+
+# Measures a section of the run when profiling is enabled, to be used as a context manager.
+# Example: with tracing.span("go", "install.download"): ...
+def span(name: str, category: str = "superinvoke", **args: Any):
+    if not __STATE["enabled"]:
+        return __NULL_SPAN
+
+    return _Span(name, category, args)
+
+
+def enabled() -> bool:
+    return __STATE["enabled"]
+
+
+# Enables profiling, printing the timing summary at exit and writing the Chrome trace event JSON
+# of the run to output if specified. Values are the ones accepted by SUPERINVOKE_PROFILE.
+def enable(value: Any = "1") -> None:
+    value = str(value).strip()
+    if value.lower() in DISABLED_VALUES:
+        return
+
+    with __lock:
+        __STATE["enabled"] = True
+        if value.lower() not in SUMMARY_VALUES:
+            __STATE["output"] = value
+
+        if not __STATE["registered"]:
+            __STATE["registered"] = True
+            atexit.register(report)
+
+
+# Aggregates the recorded spans by category and name, slowest first, as their category, name,
+# number of calls and total, mean and maximum duration in nanoseconds.
+def summary() -> List[Tuple[str, str, int, int, int, int]]:
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for name, category, _, duration, _, _ in list(__SPANS):
+        groups.setdefault((category, name), []).append(duration)
+
+    rows = [
+        (category, name, len(durations), sum(durations), sum(durations) // len(durations), max(durations))
+        for (category, name), durations in groups.items()
+    ]
+
+    return sorted(rows, key=lambda row: -row[3])
+
+
+# Gets the recorded spans as Chrome trace events, which can be opened with chrome://tracing or Perfetto.
+def trace() -> dict:
+    pid = os.getpid()
+    threads: Dict[int, int] = {}
+    events = []
+
+    for name, category, start, duration, thread, args in list(__SPANS):
+        tid = threads.setdefault(thread, len(threads))
+        events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - __ORIGIN) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            }
+        )
+
+    for thread, tid in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": f"thread-{tid}"}})
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+# Prints the timing summary to stderr and writes the Chrome trace, if enabled.
+def report() -> None:
+    if not __STATE["enabled"] or not __SPANS:
+        return
+
+    rows = summary()
+
+    width = min(max(len(row[1]) for row in rows[:SUMMARY_ROWS]), 80)
+    lines = [f"{'category':<16} {'name':<{width}} {'calls':>6} {'total':>10} {'mean':>10} {'max':>10}"]
+    for category, name, calls, total, mean, maximum in rows[:SUMMARY_ROWS]:
+        name = name if len(name) <= width else f"{name[:width - 3]}..."
+        lines.append(
+            f"{category:<16} {name:<{width}} {calls:>6} {__ms(total):>10} {__ms(mean):>10} {__ms(maximum):>10}"
+        )
+
+    if len(rows) > SUMMARY_ROWS:
+        lines.append(f"... {len(rows) - SUMMARY_ROWS} more")
+
+    print("\nSuperinvoke profile:\n" + "\n".join(lines), file=sys.stderr)
+
+    output: Optional[str] = __STATE["output"]
+    if output:
+        import json
+
+        with open(output, "w") as f:
+            json.dump(trace(), f)
+        print(f"Chrome trace written to {output}", file=sys.stderr)
+
+
+def __ms(nanoseconds: int) -> str:
+    return f"{nanoseconds / 1e6:.1f}ms"
+
+
+enable(os.environ.get("SUPERINVOKE_PROFILE", ""))
@@ -1,15 +1,36 @@
+import fnmatch
+import functools
+import hashlib
+import json
 import os
 import re
 import shutil
+import struct
+import sys
+import threading
+import zlib
+from contextlib import contextmanager
 from enum import Enum
 from pathlib import Path
-from typing import List, Literal, Optional
+from typing import Any, BinaryIO, Dict, Iterator, List, Literal, Optional, Tuple
 
-import semantic_version
-from download import download as fetch
+# Heavy dependencies (semantic_version, archive and HTTP modules) are imported
+# where they are used so that loading superinvoke, which happens on every task, stays fast.
 
 VERSION_REGEX = re.compile(r"(\d+\.\d+(?:\.\d+)?)", flags=re.MULTILINE)
 
+CHUNK_SIZE = 1024 * 1024
+
+# Supported digest algorithms and the length of their hex values.
+DIGEST_ALGORITHMS = {"sha256": 64, "sha512": 128}
+
+DIGEST_REGEX = re.compile(r"^[0-9a-f]+$")
+
+GLOB_CHARS = re.compile(r"[*?\[]")
+
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.xz", ".txz", ".tar.bz2", ".tbz", ".tbz2")
+ZIP_EXTENSIONS = (".zip",)
+
 
 # String enumerator.
 class StrEnum(str, Enum):
@@ -36,6 +57,90 @@ def next_arg(string: str) -> str:
     return (string[:lpos], string[lpos + 1 :]) if lpos != -1 else (string, "")
 
 
+# Index of the executables found in PATH, built in-process instead of spawning `which`.
+# It is rebuilt only when PATH or the modification time of any of its directories change.
+class Executables:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._path: Optional[str] = None
+        self._signature: Tuple[Optional[int], ...] = ()
+        self._index: Dict[str, List[str]] = {}
+
+    @staticmethod
+    def _extensions() -> List[str]:
+        # Windows executables can be invoked without their extension
+        if sys.platform == "win32":
+            return [os.path.normcase(ext) for ext in os.environ.get("PATHEXT", ".EXE").split(os.pathsep) if ext]
+        return []
+
+    @staticmethod
+    def _stat(dir: str) -> Optional[int]:
+        try:
+            return os.stat(dir).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh(self) -> None:
+        path = os.environ.get("PATH", "")
+        dirs = [dir or "." for dir in path.split(os.pathsep)]
+
+        # Taken before listing the directories, so executables added meanwhile change it again
+        signature = tuple(self._stat(dir) for dir in dirs)
+        if path == self._path and signature == self._signature:
+            return
+
+        extensions = self._extensions()
+        index: Dict[str, List[str]] = {}
+
+        # Candidates are kept in PATH order and checked for execution permissions on lookup
+        for dir in dirs:
+            try:
+                entries = os.listdir(dir)
+            except OSError:
+                continue
+
+            for entry in entries:
+                name = os.path.normcase(entry)
+                index.setdefault(name, []).append(os.path.join(dir, entry))
+
+                root, ext = os.path.splitext(name)
+                if ext in extensions:
+                    index.setdefault(root, []).append(os.path.join(dir, entry))
+
+        self._path = path
+        self._signature = signature
+        self._index = index
+
+    # Resolves a program to its executable path, if any.
+    def which(self, program: str) -> Optional[str]:
+        program = str(program)
+
+        # Programs with a path are not looked up in PATH
+        if os.path.dirname(program):
+            for candidate in [program, *(program + ext for ext in self._extensions())]:
+                if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+                    return candidate
+            return None
+
+        with self._lock:
+            self._refresh()
+            candidates = self._index.get(os.path.normcase(program), [])
+
+        for candidate in candidates:
+            if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+                return candidate
+
+        return None
+
+
+executables = Executables()
+
+
+# Resolves a program to its executable path in PATH, if any.
+def which(program: str) -> Optional[str]:
+    return executables.which(program)
+
+
 # Creates a file or a directory in the specified path (overwritting).
 def create(path: str, data: List[str] = [""], dir: bool = False) -> None:
     if dir:
@@ -72,6 +177,89 @@ def move(source_path: str, dest_path: str) -> None:
     shutil.move(str(source_path), str(dest_path))
 
 
+# Holds an exclusive advisory lock on the specified file, waiting while another thread or process holds it.
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    create(os.path.dirname(str(path)), dir=True)
+
+    with open(str(path), "a+b") as f:
+        if sys.platform == "win32":
+            import msvcrt
+
+            # Blocking locks give up after 10 seconds, so they are retried until acquired
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# Parsed JSON files by path, as their stat signature and contents.
+__JSON_CACHE: Dict[str, tuple] = {}
+
+
+# Reads a JSON object file, or an empty one if it does not exist or is not valid. Files are only
+# parsed again when modified, so the returned object is shared and must not be mutated.
+def read_json(path: str) -> dict:
+    try:
+        info = os.stat(str(path))
+    except OSError:
+        return {}
+
+    # Atomic writes always replace the inode, even within the resolution of the modification time
+    signature = (info.st_mtime_ns, info.st_size, info.st_ino)
+
+    cached = __JSON_CACHE.get(str(path))
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    try:
+        with open(str(path), "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+
+    if not isinstance(data, dict):
+        data = {}
+
+    __JSON_CACHE[str(path)] = (signature, data)
+
+    return data
+
+
+# Writes a JSON file atomically, through a temporary file that replaces it, so readers in other
+# threads and processes never see a partially written file.
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = None) -> None:
+    create(os.path.dirname(str(path)), dir=True)
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=indent, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, str(path))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 # Removes a file or a directory in the specified path.
 def remove(path: str, dir: bool = False) -> None:
     if dir:
@@ -85,35 +273,424 @@ def extract(source_path: str, dest_path: str) -> None:
     shutil.unpack_archive(str(source_path), str(dest_path))
 
 
-# Downloads a file to the specified path.
-def download(url: str, path: str) -> None:
-    fetch(str(url), str(path), progressbar=False, replace=True, verbose=False)
+# Extracts only the specified member of a zip, tar, gztar, bztar, or xztar file to the specified path.
+def extract_member(source_path: str, member: str, dest_path: str) -> None:
+    import tarfile
+    import zipfile
+
+    member = os.path.normpath(member)
+
+    if zipfile.is_zipfile(str(source_path)):
+        with zipfile.ZipFile(str(source_path)) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and os.path.normpath(info.filename) == member:
+                    with archive.open(info) as source, open(str(dest_path), "wb") as dest:
+                        shutil.copyfileobj(source, dest, CHUNK_SIZE)
+                    return
+    else:
+        with tarfile.open(str(source_path)) as archive:
+            # Stop at the first match so the rest of the archive is never decompressed
+            for info in archive:
+                if (info.isfile() or info.issym() or info.islnk()) and os.path.normpath(info.name) == member:
+                    source = archive.extractfile(info)
+                    with source, open(str(dest_path), "wb") as dest:
+                        shutil.copyfileobj(source, dest, CHUNK_SIZE)
+                    return
+
+    raise KeyError(f"{member} not found in {source_path}")
+
+
+# Downloads a file to the specified path, resuming and retrying on failures.
+# If a digest is specified, the file is verified while it is downloaded.
+def download(url: str, path: str, digest: Optional[str] = None) -> None:
+    from . import network
+
+    network.download(str(url), str(path), digest=digest)
+
+
+# Computes the hex digest of the file of an URL while downloading it, without writing it to disk.
+def download_digest(url: str, algorithm: str = "sha256") -> str:
+    from . import network
+
+    hash = hashlib.new(algorithm)
+    with network.stream(str(url)) as response:
+        for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+            hash.update(chunk)
+    return hash.hexdigest()
+
+
+# Raised when an archive member cannot be extracted from a non-seekable stream.
+class StreamError(Exception):
+    pass
+
+
+# Downloads a zip, tar, gztar, bztar, or xztar file extracting only the specified member to the
+# specified path. Archives are decompressed while downloading and never written to disk, unless
+# their format cannot be streamed, in which case they are downloaded to a temporary file first.
+# If a digest is specified, the whole archive is verified and the member removed on mismatch.
+def download_member(url: str, member: str, path: str, digest: Optional[str] = None) -> None:
+    import tempfile
+
+    from . import network
+
+    name = str(url).split("?")[0].lower()
+
+    # Interrupted streams cannot be resumed, so they are retried as a resumable download
+    try:
+        if name.endswith(TAR_EXTENSIONS):
+            with network.stream(str(url), digest=digest) as response:
+                return stream_tar_member(response, member, path)
+        elif name.endswith(ZIP_EXTENSIONS):
+            with network.stream(str(url), digest=digest) as response:
+                return stream_zip_member(response, member, path)
+    except (StreamError, network.RetryableError):
+        pass
+    except network.DigestError:
+        if exists(path) == "file":
+            remove(path)
+        raise
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(str(path)) or None) as TMP:
+        download(url, f"{TMP}/{name.split('/')[-1]}", digest=digest)
+        extract_member(f"{TMP}/{name.split('/')[-1]}", member, path)
+
+
+# Extracts only the specified member of a tar stream, optionally compressed, to the specified path.
+def stream_tar_member(stream: BinaryIO, member: str, path: str) -> None:
+    import tarfile
+
+    member = os.path.normpath(member)
+
+    with tarfile.open(fileobj=stream, mode="r|*") as archive:
+        for info in archive:
+            if os.path.normpath(info.name) != member:
+                continue
+
+            # Links point to previous members that are already gone from the stream
+            if not info.isfile():
+                raise StreamError(f"{member} is not a regular file")
+
+            with archive.extractfile(info) as source, open(str(path), "wb") as dest:
+                shutil.copyfileobj(source, dest, CHUNK_SIZE)
+            return
+
+    raise KeyError(f"{member} not found in archive")
+
+
+# Extracts only the specified member of a zip stream to the specified path, walking its local file
+# headers instead of the central directory at the end of the archive.
+def stream_zip_member(stream: BinaryIO, member: str, path: str) -> None:
+    import zipfile
+
+    member = os.path.normpath(member)
+    buffer = bytearray()
+
+    def read(size: int) -> bytes:
+        while len(buffer) < size:
+            chunk = stream.read(max(size - len(buffer), CHUNK_SIZE))
+            if not chunk:
+                break
+            buffer.extend(chunk)
+        data = bytes(buffer[:size])
+        del buffer[:size]
+        return data
+
+    while True:
+        header = read(30)
+        if len(header) < 30 or header[:4] != b"PK\x03\x04":
+            break
+
+        _, _, flags, method, _, _, _, compressed_size, _, name_size, extra_size = struct.unpack("<IHHHHHIIIHH", header)
+        name = read(name_size).decode("utf-8" if flags & 0x800 else "cp437")
+        extra = read(extra_size)
+
+        # Sizes are stored in the extra field (zip64) or after the data (data descriptor)
+        if compressed_size == 0xFFFFFFFF or (flags & 0x08 and method != zipfile.ZIP_DEFLATED):
+            raise StreamError(f"{name} cannot be streamed")
+
+        matches = not name.endswith("/") and os.path.normpath(name) == member
+        dest = open(str(path), "wb") if matches else None
+
+        try:
+            if method == zipfile.ZIP_STORED:
+                remaining = compressed_size
+                while remaining:
+                    data = read(min(remaining, CHUNK_SIZE))
+                    if not data:
+                        raise StreamError(f"{name} is truncated")
+                    remaining -= len(data)
+                    if dest:
+                        dest.write(data)
+            elif method == zipfile.ZIP_DEFLATED:
+                decompressor = zlib.decompressobj(-15)
+                remaining = compressed_size if not flags & 0x08 else None
+                while not decompressor.eof:
+                    data = read(CHUNK_SIZE if remaining is None else min(remaining, CHUNK_SIZE))
+                    if not data:
+                        raise StreamError(f"{name} is truncated")
+                    if remaining is not None:
+                        remaining -= len(data)
+                    data = decompressor.decompress(data)
+                    if dest:
+                        dest.write(data)
+                buffer[:0] = decompressor.unused_data
+            else:
+                raise StreamError(f"{name} compression method is not supported")
+        finally:
+            if dest:
+                dest.close()
+
+        if matches:
+            return
+
+        # Skip the data descriptor, its signature is optional and its sizes are 8 bytes long for zip64
+        if flags & 0x08:
+            descriptor = read(4)
+            if descriptor != b"PK\x07\x08":
+                buffer[:0] = descriptor
+            read(20 if __has_zip64_extra(extra) else 12)
+
+    raise KeyError(f"{member} not found in archive")
+
+
+# Checks whether a zip local file header extra field contains a zip64 record.
+def __has_zip64_extra(extra: bytes) -> bool:
+    while len(extra) >= 4:
+        id, size = struct.unpack("<HH", extra[:4])
+        if id == 0x0001:
+            return True
+        extra = extra[4 + size :]
+    return False
+
+
+# Computes the hex digest of a file in the specified path.
+def digest(path: str, algorithm: str = "sha256") -> str:
+    hash = hashlib.new(algorithm)
+    with open(str(path), "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hash.update(chunk)
+    return hash.hexdigest()
+
+
+# Parses a digest in the form algorithm:hex into its algorithm and lowercase hex value.
+# Digests without algorithm are sha256 or sha512 depending on their length.
+def parse_digest(digest: str) -> Tuple[str, str]:
+    algorithm, _, value = str(digest).strip().rpartition(":")
+    algorithm, value = algorithm.lower(), value.lower()
+
+    if not algorithm:
+        algorithm = next((name for name, length in DIGEST_ALGORITHMS.items() if length == len(value)), "")
+
+    if DIGEST_ALGORITHMS.get(algorithm) != len(value) or not DIGEST_REGEX.match(value):
+        raise ValueError(f"Invalid digest {digest}, expected sha256:<hex> or sha512:<hex>")
+
+    return algorithm, value
 
 
 # Checks whether an input has a compatible version with target.
 def has_compatible_version(input: str, target: str) -> bool:
+    return compatible_version(input, target) is not None
+
+
+# Gets the first version in input that is compatible with target if any. Results are cached
+# by input and target, as the same tool outputs are checked again across tasks.
+@functools.lru_cache(maxsize=256)
+def compatible_version(input: str, target: str) -> Optional[str]:
     if not target:
-        return False
+        return None
+
+    spec = __compile_spec(target)
+    if spec is None:
+        return None
+
+    seen = set()
+    for match in VERSION_REGEX.finditer(input):
+        candidate = match.group(1)
+        if candidate in seen:
+            continue
+        seen.add(candidate)
+
+        version = __parse_version(candidate)
+        if version is not None and version in spec:
+            return str(version)
+
+    return None
+
+
+# Compiles a semantic version spec once per target.
+@functools.lru_cache(maxsize=256)
+def __compile_spec(target: str):
+    import semantic_version
 
     try:
-        target = semantic_version.SimpleSpec(target)
+        return semantic_version.SimpleSpec(target)
     except Exception:
-        return False
+        return None
 
-    for version in VERSION_REGEX.findall(input):
-        if not version:
-            continue
 
-        # Add base minor if not present
-        if len(version.split(".")) < 3:
-            version += ".0"
+# Parses a version candidate once, adding the base patch if not present.
+@functools.lru_cache(maxsize=1024)
+def __parse_version(version: str):
+    import semantic_version
 
-        try:
-            version = semantic_version.Version(version)
-        except Exception:
-            continue
+    if len(version.split(".")) < 3:
+        version += ".0"
 
-        if version in target:
-            return True
+    try:
+        return semantic_version.Version(version)
+    except Exception:
+        return None
 
-    return False
+
+# Checks whether a pattern contains glob wildcards.
+def is_glob(pattern: str) -> bool:
+    return GLOB_CHARS.search(pattern) is not None
+
+
+# Node of a glob trie, each one is a path segment of the inserted patterns.
+class _GlobNode:
+    __slots__ = ("literals", "wildcards", "globstar", "recursive", "owners")
+
+    def __init__(self, recursive: bool = False):
+        self.literals: Dict[str, "_GlobNode"] = {}
+        self.wildcards: List[Tuple[str, Any, "_GlobNode"]] = []
+        self.globstar: Optional["_GlobNode"] = None
+        # Whether the node is a ** segment, which consumes any number of segments
+        self.recursive = recursive
+        self.owners: set = set()
+
+
+# Matches paths against many glob patterns at once, returning the owners of the matching patterns.
+# Patterns are split by / into a trie of segments, so literal segments shared by many patterns are
+# compared once with a dict lookup and only wildcard segments are matched with a precompiled regular
+# expression. * and ? do not match /, ** matches any number of directories, and patterns without
+# wildcards match the file itself or anything inside it when it is a directory.
+class GlobTrie:
+    def __init__(self):
+        self._root = _GlobNode()
+
+    def add(self, pattern: str, owner: Any) -> None:
+        segments = [segment for segment in str(pattern).replace("\\", "/").split("/") if segment not in ["", "."]]
+        if not segments:
+            return
+
+        self._insert(segments, owner)
+
+        # Patterns without wildcards may be directories
+        if not is_glob(pattern):
+            self._insert([*segments, "**"], owner)
+
+    def _insert(self, segments: List[str], owner: Any) -> None:
+        node = self._root
+        for segment in segments:
+            if segment == "**":
+                if node.globstar is None:
+                    node.globstar = _GlobNode(recursive=True)
+                node = node.globstar
+            elif is_glob(segment):
+                for pattern, _, child in node.wildcards:
+                    if pattern == segment:
+                        node = child
+                        break
+                else:
+                    child = _GlobNode()
+                    node.wildcards.append((segment, re.compile(fnmatch.translate(segment)).match, child))
+                    node = child
+            else:
+                node = node.literals.setdefault(segment, _GlobNode())
+
+        node.owners.add(owner)
+
+    def match(self, path: str) -> set:
+        segments = [segment for segment in str(path).replace("\\", "/").split("/") if segment]
+        owners: set = set()
+
+        stack = [(self._root, 0)]
+        visited = set()
+        while stack:
+            node, index = stack.pop()
+            if (id(node), index) in visited:
+                continue
+            visited.add((id(node), index))
+
+            # ** consumes from zero to every remaining segment
+            if node.globstar is not None:
+                stack.extend((node.globstar, next) for next in range(index, len(segments) + 1))
+
+            if index == len(segments):
+                owners |= node.owners
+                continue
+
+            segment = segments[index]
+            child = node.literals.get(segment)
+            if child is not None:
+                stack.append((child, index + 1))
+
+            for _, match, child in node.wildcards:
+                if match(segment):
+                    stack.append((child, index + 1))
+
+        return owners
+
+    # Walks the files under the root directory matching any pattern, yielding their path relative to it
+    # and their directory entry. Patterns are matched while walking, one segment at a time, so directories
+    # that no pattern can match are not walked at all, and neither are the ones with an ignored name.
+    def walk(self, root: str, ignore: Tuple[str, ...] = ()) -> Iterator[Tuple[str, os.DirEntry]]:
+        stack = [("", self._closure([self._root]))]
+        while stack:
+            dir, nodes = stack.pop()
+
+            try:
+                with os.scandir(os.path.join(root, dir) if dir else root) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                continue
+
+            for entry in entries:
+                next = self._step(nodes, entry.name)
+                if not next:
+                    continue
+
+                path = f"{dir}/{entry.name}" if dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in ignore:
+                        stack.append((path, next))
+                elif entry.is_file() and any(node.owners for node in next):
+                    yield path, entry
+
+    # Gets the nodes reached from the nodes by consuming a segment.
+    @classmethod
+    def _step(cls, nodes: List[_GlobNode], segment: str) -> List[_GlobNode]:
+        next = []
+        for node in nodes:
+            if node.recursive:
+                next.append(node)
+
+            child = node.literals.get(segment)
+            if child is not None:
+                next.append(child)
+
+            for _, match, child in node.wildcards:
+                if match(segment):
+                    next.append(child)
+
+        return cls._closure(next) if next else next
+
+    # Gets the nodes together with the ** nodes reachable from them without consuming any segment.
+    @staticmethod
+    def _closure(nodes: List[_GlobNode]) -> List[_GlobNode]:
+        closure: List[_GlobNode] = []
+        seen = set()
+
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            closure.append(node)
+
+            if node.globstar is not None:
+                stack.append(node.globstar)
+
+        return closure
@@ -0,0 +1,17 @@
+import pytest
+from invoke import Config, Context
+
+import superinvoke
+
+
+@pytest.fixture
+def context(tmp_path, monkeypatch) -> Context:
+    # Superinvoke caches are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SUPERINVOKE_CACHE_HOME", str(tmp_path / "cache"))
+
+    namespace = superinvoke.init()
+    config = Config()
+    config.load_collection(namespace.configuration())
+
+    return Context(config)
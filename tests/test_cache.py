@@ -0,0 +1,47 @@
+import os
+import threading
+
+from superinvoke.objects import Cache
+
+URL = "http://127.0.0.1:9/artifact.tar.gz"
+
+
+def cache(url: str, data: bytes) -> str:
+    entry = Cache.Entry(Cache.Key(url))
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    with open(entry, "wb") as f:
+        f.write(data)
+
+    return entry
+
+
+def test_prune_waits_for_entries_being_read(context):
+    entry = cache(URL, b"artifact")
+
+    with Cache.Open(URL) as path:
+        pruner = threading.Thread(target=Cache.Prune, kwargs={"size": 0})
+        pruner.start()
+        pruner.join(0.5)
+
+        assert pruner.is_alive()
+        with open(path, "rb") as f:
+            assert f.read() == b"artifact"
+
+    pruner.join(5)
+
+    assert not pruner.is_alive()
+    assert not os.path.exists(entry)
+
+
+def test_prune_evicts_least_recently_used_entries(context):
+    old = cache(f"{URL}.old", b"old")
+    new = cache(f"{URL}.new", b"new")
+    os.utime(old, (1, 1))
+
+    assert Cache.Prune(size=3) == (1, 3)
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+
+    # Reading an entry marks it as recently used
+    with Cache.Open(f"{URL}.new") as path:
+        assert path == new
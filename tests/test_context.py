@@ -0,0 +1,94 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from invoke import Config, Context
+
+import superinvoke
+
+
+def test_arun_reads_lines_longer_than_the_stream_limit(context):
+    line = "x" * 100_000
+    command = f"{sys.executable} -c \"import sys; sys.stdout.write('x' * 100000)\""
+
+    result = context.gather(context.arun(command, hide="both"))[0]
+
+    assert result.ok
+    assert result.stdout == line
+
+
+def test_arun_decodes_characters_split_between_chunks(context):
+    command = f"{sys.executable} -c \"import sys; sys.stdout.buffer.write(('a' + 'é' * 70000).encode())\""
+
+    result = context.gather(context.arun(command, hide="both"))[0]
+
+    assert result.stdout == "a" + "é" * 70000
+
+
+def test_aattempt_returns_the_output_of_failed_commands(context):
+    command = f"{sys.executable} -c \"import sys; sys.stderr.write('boom'); sys.exit(3)\""
+
+    assert context.gather(context.aattempt(command))[0] == "boom"
+
+
+def test_aattempt_raises_when_timed_out(context):
+    with pytest.raises(TimeoutError):
+        context.gather(context.aattempt(f'{sys.executable} -c "import time; time.sleep(10)"', timeout=0.5))
+
+
+def test_filesystem_helpers_resolve_paths_against_the_cd_of_each_thread(context, tmp_path):
+    directories = [tmp_path / f"thread-{index}" for index in range(16)]
+    for directory in directories:
+        directory.mkdir()
+
+    def cycle(directory):
+        # Each thread has its own context, as each task run does
+        thread_context = Context(context.config)
+
+        with thread_context.cd(str(directory)):
+            for index in range(50):
+                thread_context.create(f"file-{index}.txt", [directory.name, str(index)])
+                assert thread_context.read(f"file-{index}.txt") == [directory.name, str(index)]
+                thread_context.move(f"file-{index}.txt", f"moved-{index}.txt")
+                assert thread_context.exists(f"moved-{index}.txt") == "file"
+                if index % 2:
+                    thread_context.remove(f"moved-{index}.txt")
+
+    with ThreadPoolExecutor(max_workers=len(directories)) as pool:
+        list(pool.map(cycle, directories))
+
+    assert os.getcwd() == str(tmp_path)
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(directory.name for directory in directories)
+    for directory in directories:
+        assert sorted(os.listdir(directory)) == sorted(f"moved-{index}.txt" for index in range(0, 50, 2))
+        assert all(directory.joinpath(name).read_text().startswith(directory.name) for name in os.listdir(directory))
+
+
+def test_arun_falls_back_to_the_default_shell(monkeypatch):
+    monkeypatch.delenv("SHELL", raising=False)
+    monkeypatch.delenv("COMSPEC", raising=False)
+
+    config = Config()
+    config.load_collection(superinvoke.init().configuration())
+    context = Context(config)
+
+    assert context.config.run.shell is None
+    assert context.run("echo hi", hide="both", in_stream=False).stdout.strip() == "hi"
+    assert context.gather(context.aattempt("echo hi"))[0] == "hi"
+
+
+def test_changed_collections_match_like_task_inputs(context):
+    git = "git -c user.email=test@test -c user.name=test"
+    context.run("git init -q", hide="both", in_stream=False)
+    for path in ["libs/a/b.py", "services/api/main.py", "README.md"]:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write("")
+    context.run(f"git add -A && {git} commit -q -m initial", hide="both", in_stream=False)
+    context.run(f"echo change > libs/a/b.py && {git} commit -q -am change", hide="both", in_stream=False)
+
+    mapping = {"libs/*": "shallow", "README.md": "docs", "services/api/": "api"}
+    assert context.changed_collections({**mapping, "libs/**": "deep"}) == ["deep"]
+    assert context.changed_collections({**mapping, "libs/": "prefix"}) == ["prefix"]
+    assert context.changed_collections({**mapping, "libs": "dir"}) == ["dir"]
@@ -0,0 +1,99 @@
+import hashlib
+import http.server
+import os
+import threading
+
+import pytest
+
+from superinvoke import network
+
+DATA = os.urandom(256 * 1024)
+
+
+# Serves DATA at /artifact, supporting range requests, and a redirect to it at /redirect.
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.server.requests.append((self.path, self.headers.get("Range")))
+
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/artifact")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = 0, len(DATA) - 1
+        if self.headers.get("Range"):
+            first, last = self.headers["Range"].split("=", 1)[1].split("-")
+            start, end = int(first), int(last) if last else end
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        else:
+            self.send_response(200)
+
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        try:
+            self.wfile.write(DATA[start : end + 1])
+        except OSError:
+            pass
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    monkeypatch.setenv("no_proxy", "127.0.0.1")
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_sends_a_single_request_per_hop(server, tmp_path):
+    session = network.Session()
+    digest = f"sha256:{hashlib.sha256(DATA).hexdigest()}"
+
+    session.download(f"http://127.0.0.1:{server.server_address[1]}/redirect", str(tmp_path / "file"), digest=digest)
+    session.close()
+
+    assert (tmp_path / "file").read_bytes() == DATA
+    assert server.requests == [("/redirect", None), ("/artifact", None)]
+
+
+def test_download_fetches_large_artifacts_in_ranges_from_the_final_url(server, tmp_path):
+    session = network.Session(parallel_threshold=64 * 1024, parallel_chunks=4)
+    digest = f"sha256:{hashlib.sha256(DATA).hexdigest()}"
+
+    session.download(f"http://127.0.0.1:{server.server_address[1]}/redirect", str(tmp_path / "file"), digest=digest)
+    session.close()
+
+    assert (tmp_path / "file").read_bytes() == DATA
+    assert server.requests[:2] == [("/redirect", None), ("/artifact", None)]
+    assert sorted(server.requests[2:]) == sorted(
+        ("/artifact", f"bytes={start}-{start + 64 * 1024 - 1}") for start in range(0, len(DATA), 64 * 1024)
+    )
+
+
+def test_download_discards_artifacts_not_matching_their_digest(server, tmp_path):
+    session = network.Session()
+
+    with pytest.raises(network.DigestError):
+        session.download(
+            f"http://127.0.0.1:{server.server_address[1]}/artifact", str(tmp_path / "file"), f"sha256:{'0' * 64}"
+        )
+    session.close()
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,69 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+import superinvoke
+from superinvoke import collections, constants
+from superinvoke.objects import Manifest, Tool, Tools
+
+
+@pytest.fixture
+def tools(context):
+    TestTools = type(Tools)(
+        "TestTools",
+        (Tools,),
+        {
+            f"TOOL_{index}": Tool(
+                name=f"tool-{index}",
+                version="^1.0.0",
+                tags=[],
+                links={constants.Platforms.CURRENT: (f"http://127.0.0.1:9/tool-{index}", ".")},
+            )
+            for index in range(8)
+        },
+    )
+    superinvoke.init(tools=TestTools)
+
+    return TestTools
+
+
+def test_install_interrupted_does_not_install_pending_tools(context, tools, monkeypatch):
+    started = []
+    lock = threading.Lock()
+
+    def install_tool(context, tool, progress, task_id, abort):
+        with lock:
+            started.append(tool.name)
+
+        # Interrupts the install as Ctrl-C would once every tool is queued, stopping at the next stage
+        if tool.name == "tool-0":
+            time.sleep(0.2)
+            os.kill(os.getpid(), signal.SIGINT)
+            abort.wait(5)
+
+    monkeypatch.setattr(collections.tool, "install_tool", install_tool)
+
+    with pytest.raises(KeyboardInterrupt):
+        collections.tool.install(context, include="*", yes=True, jobs=1)
+
+    assert started == ["tool-0"]
+
+
+def test_tools_without_version_are_installed_if_they_exist(context):
+    assert collections.tool.check_tool_version(context, Tool(name="sh", version=None, tags=[], path="sh"))
+    assert not collections.tool.check_tool_version(context, Tool(name="nope", version=None, tags=[], path="nope"))
+
+    mine = Tool(name="mine", version=None, tags=[])
+    assert not collections.tool.check_tool_version(context, mine)
+
+    os.makedirs(os.path.dirname(mine.path), exist_ok=True)
+    with open(mine.path, "w") as f:
+        f.write("#!/bin/sh\nexit 1\n")
+    os.chmod(mine.path, 0o755)
+
+    assert collections.tool.check_tool_version(context, mine)
+    assert Manifest.Get(mine)["version"] == ""
+    assert Manifest.Check(mine)
@@ -0,0 +1,157 @@
+import io
+import json
+import os
+import tarfile
+import zipfile
+from contextlib import contextmanager
+
+import pytest
+
+from superinvoke import network, utils
+
+
+# Stream that can only be written, so zip files written to it have data descriptors.
+class UnseekableWriter(io.RawIOBase):
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data.extend(data)
+        return len(data)
+
+
+# Stream that returns few bytes on every read, like a network response.
+class TrickleReader(io.RawIOBase):
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self.stream.read(min(size, 7) if size >= 0 else 7)
+
+
+def zip_bytes(members, compression=zipfile.ZIP_DEFLATED, seekable=True):
+    stream = io.BytesIO() if seekable else UnseekableWriter()
+    with zipfile.ZipFile(stream, "w", compression=compression) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return stream.getvalue() if seekable else bytes(stream.data)
+
+
+MEMBERS = {"README.md": b"readme\n" * 1000, "bin/": b"", "bin/tool": os.urandom(200_000)}
+
+
+def test_write_json_atomic_replaces_the_file_without_leftovers(tmp_path):
+    path = tmp_path / "nested" / "data.json"
+
+    utils.write_json_atomic(str(path), {"b": 1, "a": [1, 2]}, indent=2)
+    utils.write_json_atomic(str(path), {"c": True})
+
+    assert json.loads(path.read_text()) == {"c": True}
+    assert os.listdir(path.parent) == ["data.json"]
+
+
+def test_read_json_parses_modified_files_again(tmp_path):
+    path = tmp_path / "data.json"
+
+    assert utils.read_json(str(path)) == {}
+
+    utils.write_json_atomic(str(path), {"version": 1})
+    assert utils.read_json(str(path)) == {"version": 1}
+    assert utils.read_json(str(path)) is utils.read_json(str(path))
+
+    utils.write_json_atomic(str(path), {"version": 2})
+    assert utils.read_json(str(path)) == {"version": 2}
+
+    path.write_text("[1, 2]")
+    assert utils.read_json(str(path)) == {}
+
+
+def test_which_finds_executables_added_while_indexing(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    executables = utils.Executables()
+    listdir = os.listdir
+
+    # Installs a program right after the PATH directory is listed
+    def install_after_listing(path):
+        entries = listdir(path)
+        if path == str(tmp_path) and not (tmp_path / "late").exists():
+            (tmp_path / "late").write_text("#!/bin/sh\n")
+            (tmp_path / "late").chmod(0o755)
+            # The directory must look modified even with coarse modification times
+            os.utime(tmp_path, ns=(os.stat(tmp_path).st_atime_ns, os.stat(tmp_path).st_mtime_ns + 1))
+        return entries
+
+    monkeypatch.setattr(os, "listdir", install_after_listing)
+    assert executables.which("late") is None
+
+    monkeypatch.setattr(os, "listdir", listdir)
+    assert executables.which("late") == str(tmp_path / "late")
+
+
+@pytest.mark.parametrize(
+    "archive",
+    [
+        zip_bytes(MEMBERS),
+        zip_bytes(MEMBERS, compression=zipfile.ZIP_STORED),
+        zip_bytes(MEMBERS, seekable=False),
+    ],
+    ids=["deflated", "stored", "data-descriptors"],
+)
+@pytest.mark.parametrize("member", ["README.md", "bin/tool"])
+def test_stream_zip_member_extracts_the_member(tmp_path, archive, member):
+    path = tmp_path / "member"
+
+    utils.stream_zip_member(TrickleReader(archive), member, str(path))
+
+    assert path.read_bytes() == MEMBERS[member]
+
+
+def test_stream_zip_member_raises_when_the_member_is_missing(tmp_path):
+    with pytest.raises(KeyError):
+        utils.stream_zip_member(io.BytesIO(zip_bytes(MEMBERS)), "missing", str(tmp_path / "member"))
+
+
+def test_stream_tar_member_extracts_the_member_of_compressed_tars(tmp_path):
+    stream = io.BytesIO()
+    with tarfile.open(fileobj=stream, mode="w:xz") as archive:
+        for name, data in MEMBERS.items():
+            if not name.endswith("/"):
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+    path = tmp_path / "member"
+
+    utils.stream_tar_member(TrickleReader(stream.getvalue()), "bin/tool", str(path))
+
+    assert path.read_bytes() == MEMBERS["bin/tool"]
+
+
+def test_download_member_falls_back_to_a_temporary_download(tmp_path, monkeypatch):
+    # Stored members followed by a data descriptor cannot be streamed
+    archive = zip_bytes(MEMBERS, compression=zipfile.ZIP_STORED, seekable=False)
+    downloads = []
+
+    @contextmanager
+    def stream(url, digest=None):
+        yield io.BytesIO(archive)
+
+    def download(url, path, digest=None):
+        downloads.append(url)
+        with open(path, "wb") as f:
+            f.write(archive)
+
+    monkeypatch.setattr(network, "stream", stream)
+    monkeypatch.setattr(utils, "download", download)
+    path = tmp_path / "member"
+
+    utils.download_member("https://example.com/archive.zip", "bin/tool", str(path))
+
+    assert downloads == ["https://example.com/archive.zip"]
+    assert path.read_bytes() == MEMBERS["bin/tool"]
+    assert os.listdir(tmp_path) == ["member"]